@@ -2,14 +2,21 @@ import discord
 from discord.ext import commands
 from discord import ui
 import asyncio
+import functools
 import random
 import os
+import hashlib
+import json
 import logging
+import logging.handlers
+import queue
+import atexit
+import time
 from datetime import datetime
-from dotenv import load_dotenv
 from enum import Enum
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Set, Tuple
+from collections import Counter, defaultdict
 from pathlib import Path
 
 # ==================== LOGGING SETUP ====================
@@ -20,31 +27,36 @@ LOGS_FOLDER.mkdir(exist_ok=True)
 
 # Configure logging
 log_filename = LOGS_FOLDER / f"bot_{datetime.now().strftime('%Y%m%d')}.log"
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(message)s',
-    handlers=[
-        logging.FileHandler(log_filename, encoding='utf-8'),
-        logging.StreamHandler()  # Also print to console
-    ]
-)
+log_format = logging.Formatter('%(asctime)s | %(levelname)s | %(message)s')
+file_handler = logging.FileHandler(log_filename, encoding='utf-8')
+file_handler.setFormatter(log_format)
+stream_handler = logging.StreamHandler()  # Also print to console
+stream_handler.setFormatter(log_format)
+
+# Log calls only enqueue records; a listener thread does the file/console writes
+# so logging from coroutines never blocks the event loop on disk I/O
+log_queue = queue.Queue(-1)
+queue_handler = logging.handlers.QueueHandler(log_queue)
+queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+log_listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler)
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger('MafiaBot')
 
-# Text-to-speech for announcements
-# try:
-#     from gtts import gTTS
-#     TTS_AVAILABLE = True
-# except ImportError:
-#     TTS_AVAILABLE = False
-#     print("Warning: gTTS not installed. Audio announcements disabled. Run: pip install gTTS")
+# Text-to-speech for announcements. Voice feedback is disabled for now, so gTTS
+# is only imported by save_tts_audio once this flag is switched on
+TTS_AVAILABLE = False
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (.env is only needed in development; deploys set them directly)
+ENV_FILE = Path(__file__).parent / ".env"
+if not os.getenv('DISCORD_BOT_TOKEN') and ENV_FILE.exists():
+    from dotenv import load_dotenv
+    load_dotenv(ENV_FILE)
 TOKEN = os.getenv('DISCORD_BOT_TOKEN')
 
-# Audio folder setup
-# AUDIO_FOLDER = Path(__file__).parent / "audio"
-# AUDIO_FOLDER.mkdir(exist_ok=True)
+# Audio folder setup (created on first TTS generation)
+AUDIO_FOLDER = Path(__file__).parent / "audio"
 
 # Bot setup with intents
 intents = discord.Intents.default()
@@ -73,7 +85,18 @@ class GamePhase(Enum):
     ENDED = "ended"
 
 
-@dataclass
+# Shared emoji markers, so every embed shows the same icon for a role or status
+ROLE_ICONS = {
+    Role.CITIZEN: "🧑‍🤝‍🧑",
+    Role.MAFIA: "🔪",
+    Role.DOCTOR: "💉",
+    Role.POLICE: "🔍"
+}
+ALIVE_ICON = "✅"
+DEAD_ICON = "💀"
+
+
+@dataclass(slots=True)
 class Player:
     member: discord.Member
     name: str
@@ -82,7 +105,7 @@ class Player:
     doctor_self_save_used: bool = False  # Track if doctor saved themselves last round
 
 
-@dataclass
+@dataclass(slots=True)
 class GameSettings:
     num_mafia: int = 1
     num_doctor: int = 1
@@ -93,9 +116,14 @@ class GameSettings:
     mafia_skip_kills: int = 1  # How many times mafia can skip killing per game
     role_reveal_mode: int = 3  # 1=no reveal, 2=mafia or not, 3=full role + suspense
     test_mode: bool = False  # Testing mode flag
+    
+    @property
+    def min_players(self) -> int:
+        """One player per special role plus at least one Citizen"""
+        return self.num_mafia + self.num_doctor + self.num_police + 1
 
 
-@dataclass
+@dataclass(slots=True)
 class DummyMember:
     """Fake Discord member for testing"""
     id: int
@@ -113,7 +141,7 @@ class DummyMember:
         pass
 
 
-@dataclass
+@dataclass(slots=True)
 class GameState:
     phase: GamePhase = GamePhase.WAITING
     players: Dict[int, Player] = field(default_factory=dict)  # member.id -> Player
@@ -123,6 +151,7 @@ class GameState:
     guild: Optional[discord.Guild] = None
     round_number: int = 0
     voice_connected: bool = False  # Track if bot is in voice
+    audio_lock: asyncio.Lock = field(default_factory=asyncio.Lock)  # One announcement at a time
     tester_id: Optional[int] = None  # ID of the tester for test mode
     host_id: Optional[int] = None  # ID of the user who started the game
     
@@ -134,35 +163,91 @@ class GameState:
     night_actions_expected: int = 0  # Total night actions expected
     night_actions_received: int = 0  # Total night actions received
     night_auto_end_triggered: bool = False  # Prevent double-triggering
+    night_actions_done: asyncio.Event = field(default_factory=asyncio.Event)  # Set once every night action is in
     night_actions_submitted: set = field(default_factory=set)  # Player IDs who already submitted
+    night_option_cache: Dict[int, discord.SelectOption] = field(default_factory=dict)  # Built once per night
+    night_target_options: List[discord.SelectOption] = field(default_factory=list)  # Alive non-mafia
     
     # Mafia skip tracking
     mafia_skips_used: int = 0  # How many times mafia has skipped killing
     
+    # Set by assign_roles, so callers don't have to scan for non-Citizen roles
+    roles_assigned: bool = False
+    
     # Discussion tracking
     discussion_ended: bool = False  # Prevent double-triggering of voting start
     
     # Day voting
     day_votes: Dict[int, Optional[int]] = field(default_factory=dict)  # voter_id -> target_id (None = skip)
+    voting_done: asyncio.Event = field(default_factory=asyncio.Event)  # Set once every alive player has voted
     
     # Registration message
     registration_message: Optional[discord.Message] = None
     
-    # Mafia chat relay
-    mafia_messages: List[tuple] = field(default_factory=list)  # (sender_name, message)
-    
-    # Track messages to delete at end of game
-    game_messages: List[discord.Message] = field(default_factory=list)
+    # Track messages to delete at end of game as (channel_id, message_id)
+    game_messages: List[Tuple[int, int]] = field(default_factory=list)
+    
+    # Background phase tasks, cancelled when the game is torn down
+    tasks: Set[asyncio.Task] = field(default_factory=set)
+    
+    # Alive player indexes, filled by assign_roles and updated by kill()
+    alive_ids: Set[int] = field(default_factory=set)
+    mafia_ids: Set[int] = field(default_factory=set)  # Alive mafia only
+    doctor_ids: Set[int] = field(default_factory=set)  # Alive doctors only
+    police_ids: Set[int] = field(default_factory=set)  # Alive police only
+    
+    # Lowercased name -> Players with that name in join order, for the name-based test commands
+    players_by_name: Dict[str, List[Player]] = field(default_factory=dict)
+    
+    def add_player(self, player: Player):
+        """Register a player by member ID and by name"""
+        self.players[player.member.id] = player
+        self.players_by_name.setdefault(player.name.lower(), []).append(player)
+    
+    def remove_player(self, player_id: int) -> Optional[Player]:
+        """Unregister a player, returning them if they were in the game"""
+        player = self.players.pop(player_id, None)
+        if player:
+            key = player.name.lower()
+            same_name = self.players_by_name.get(key, [])
+            if player in same_name:
+                same_name.remove(player)
+            if not same_name:
+                self.players_by_name.pop(key, None)
+        return player
+    
+    def find_alive_player(self, name: str) -> Optional[Player]:
+        """Look up the first alive player with a name, ignoring case"""
+        return next((p for p in self.players_by_name.get(name.lower(), ()) if p.is_alive), None)
+    
+    def kill(self, player: Player):
+        """Mark a player as dead and drop them from the alive indexes"""
+        player.is_alive = False
+        player_id = player.member.id
+        self.alive_ids.discard(player_id)
+        self.mafia_ids.discard(player_id)
+        self.doctor_ids.discard(player_id)
+        self.police_ids.discard(player_id)
 
 
 # Active games per guild
 active_games: Dict[int, GameState] = {}
 
+# Mafia player ID -> their game, so DM relay doesn't scan every active game
+mafia_games: Dict[int, GameState] = {}
 
-async def track_message(game: GameState, message: discord.Message):
+# Settings configured with !set* commands, used as defaults for new games
+guild_settings: Dict[int, GameSettings] = {}
+
+
+def track_message(game: GameState, message: discord.Message):
     """Add a message to the list of messages to delete at game end"""
     if message:
-        game.game_messages.append(message)
+        game.game_messages.append((message.channel.id, message.id))
+
+
+# Discord epoch (2015-01-01) in ms, used to turn a timestamp into a snowflake ID
+DISCORD_EPOCH = 1420070400000
 
 
 async def delete_game_messages(game: GameState):
@@ -174,23 +259,50 @@ async def delete_game_messages(game: GameState):
     failed_count = 0
     
     try:
-        # Try bulk delete (only works for messages < 14 days old)
-        if game.text_channel:
+        # Group by channel (commands may be typed outside the game channel);
+        # sets also drop messages tracked twice
+        by_channel: Dict[int, Set[int]] = {}
+        for channel_id, message_id in game.game_messages:
+            by_channel.setdefault(channel_id, set()).add(message_id)
+        
+        # Bulk delete only works for messages < 14 days old; snowflake IDs
+        # encode creation time, so split those out without any API call
+        min_snowflake = int((time.time() - 14 * 24 * 3600) * 1000 - DISCORD_EPOCH) << 22
+        
+        for channel_id, message_ids in by_channel.items():
+            if game.text_channel and game.text_channel.id == channel_id:
+                channel = game.text_channel
+            else:
+                channel = game.guild.get_channel_or_thread(channel_id) if game.guild else None
+            if channel is None:
+                failed_count += len(message_ids)
+                continue
+            
+            deletable = [discord.Object(id=i) for i in message_ids if i >= min_snowflake]
+            old = [i for i in message_ids if i < min_snowflake]
+            
             # Split into chunks of 100 (Discord limit)
-            for i in range(0, len(game.game_messages), 100):
-                chunk = game.game_messages[i:i+100]
+            for i in range(0, len(deletable), 100):
+                chunk = deletable[i:i+100]
                 try:
-                    await game.text_channel.delete_messages(chunk)
+                    await channel.delete_messages(chunk)
                     deleted_count += len(chunk)
                 except discord.errors.HTTPException:
                     # If bulk delete fails, delete one by one
-                    for msg in chunk:
-                        try:
-                            await msg.delete()
-                            deleted_count += 1
-                        except Exception as e:
-                            failed_count += 1
-                await asyncio.sleep(0.5)  # Rate limit protection
+                    old.extend(m.id for m in chunk)
+            
+            if old:
+                # Delete concurrently; discord.py handles the per-route rate limit
+                sem = asyncio.Semaphore(5)
+                
+                async def _delete_one(message_id):
+                    async with sem:
+                        await channel.get_partial_message(message_id).delete()
+                
+                results = await asyncio.gather(*(_delete_one(i) for i in old), return_exceptions=True)
+                failed = sum(1 for r in results if isinstance(r, BaseException))
+                deleted_count += len(results) - failed
+                failed_count += failed
         
         logger.info(f"Message cleanup: {deleted_count} deleted, {failed_count} failed")
     except Exception as e:
@@ -199,6 +311,14 @@ async def delete_game_messages(game: GameState):
     game.game_messages.clear()
 
 
+async def _delayed_cleanup(game: GameState, delay: float):
+    """Delete a finished game's messages after giving players time to read them, then unregister it"""
+    await asyncio.sleep(delay)
+    await delete_game_messages(game)
+    if game.guild:
+        remove_game(game.guild.id, game)
+
+
 # ==================== AUDIO ANNOUNCEMENTS ====================
 
 # Announcement texts (Korean drama style)
@@ -221,30 +341,58 @@ async def send_game_message(game: GameState, content: str = None, embed: discord
     
     try:
         msg = await game.text_channel.send(content=content, embed=embed, view=view)
-        game.game_messages.append(msg)
+        track_message(game, msg)
         return msg
     except Exception as e:
         print(f"Failed to send message: {e}")
         return None
 
 
-async def generate_tts_audio(text: str, filename: str) -> Optional[Path]:
-    """Generate TTS audio file"""
+# Resolved audio files keyed by TTS content hash, so repeat plays skip the filesystem
+_tts_mem_cache: Dict[str, Path] = {}
+
+
+def save_tts_audio(text: str, filepath: Path):
+    """Blocking gTTS request + file write, run in a worker thread"""
+    from gtts import gTTS
+    filepath.parent.mkdir(exist_ok=True)
+    tts = gTTS(text=text, lang='en', slow=True)
+    tts.save(str(filepath))
+
+
+async def generate_tts_audio(text: str, filename: Optional[str] = None) -> Optional[Path]:
+    """
+    Get the TTS audio file for a text, generating it if needed.
+    Generated files are named by a hash of the text so edited announcements
+    never reuse stale audio. A custom recording at audio/<filename>.mp3 wins.
+    """
     if not TTS_AVAILABLE:
         return None
     
-    filepath = AUDIO_FOLDER / f"{filename}.mp3"
+    key = hashlib.sha256(f"{text}|en|slow=1".encode()).hexdigest()
+    cached = _tts_mem_cache.get(key)
+    if cached:
+        return cached
     
-    # Only generate if file doesn't exist
-    if not filepath.exists():
+    filepath = AUDIO_FOLDER / f"{key}.mp3"
+    candidates = [AUDIO_FOLDER / f"{filename}.mp3", filepath] if filename else [filepath]
+    for candidate in candidates:
         try:
-            tts = gTTS(text=text, lang='en', slow=True)
-            tts.save(str(filepath))
-            print(f"Generated audio: {filepath}")
-        except Exception as e:
-            print(f"TTS generation failed: {e}")
-            return None
+            os.stat(candidate)
+            _tts_mem_cache[key] = candidate
+            return candidate
+        except FileNotFoundError:
+            pass
+    
+    try:
+        # gTTS does network and disk I/O synchronously, keep it off the event loop
+        await asyncio.to_thread(save_tts_audio, text, filepath)
+        print(f"Generated audio: {filepath}")
+    except Exception as e:
+        print(f"TTS generation failed: {e}")
+        return None
     
+    _tts_mem_cache[key] = filepath
     return filepath
 
 
@@ -262,24 +410,20 @@ async def play_announcement(game: GameState, announcement_key: str):
     
     # Generate or get audio file
     audio_path = await generate_tts_audio(text, announcement_key)
-    if not audio_path or not audio_path.exists():
+    if not audio_path:
         return
     
     try:
-        # Wait if something is already playing
-        while voice_client.is_playing():
-            await asyncio.sleep(0.5)
-        
-        # Play the audio
-        audio_source = discord.FFmpegPCMAudio(str(audio_path))
-        voice_client.play(audio_source)
-        
-        # Wait for it to finish
-        while voice_client.is_playing():
-            await asyncio.sleep(0.5)
-        
-        # Small pause after announcement
-        await asyncio.sleep(0.5)
+        # Wait if another announcement is already playing
+        async with game.audio_lock:
+            loop = asyncio.get_running_loop()
+            done = asyncio.Event()
+            
+            # discord.py calls `after` from its audio thread when playback ends
+            audio_source = discord.FFmpegPCMAudio(str(audio_path))
+            voice_client.play(audio_source, after=lambda e: loop.call_soon_threadsafe(done.set))
+            
+            await done.wait()
         
     except Exception as e:
         print(f"Audio playback failed: {e}")
@@ -291,8 +435,7 @@ async def pre_generate_audio():
         return
     
     print("Pre-generating announcement audio files...")
-    for key, text in ANNOUNCEMENTS.items():
-        await generate_tts_audio(text, key)
+    await asyncio.gather(*(generate_tts_audio(text, key) for key, text in ANNOUNCEMENTS.items()))
     print("Audio files ready!")
 
 
@@ -300,12 +443,69 @@ def get_game(guild_id: int) -> Optional[GameState]:
     return active_games.get(guild_id)
 
 
+def remove_game(guild_id: int, game: Optional[GameState] = None):
+    """Drop a guild's game along with its mafia DM index entries.
+    Passing the game leaves a newer game registered for the guild untouched."""
+    current = active_games.get(guild_id)
+    if game is None:
+        game = current
+    if game is None:
+        return
+    if current is game:
+        del active_games[guild_id]
+    for player_id in game.players:
+        if mafia_games.get(player_id) is game:
+            del mafia_games[player_id]
+
+
+def get_settings(guild_id: int) -> GameSettings:
+    """Get the stored settings for a guild, creating defaults on first use"""
+    settings = guild_settings.get(guild_id)
+    if settings is None:
+        settings = guild_settings[guild_id] = GameSettings()
+    return settings
+
+
+def update_setting(guild_id: int, name: str, value, registration_only: bool = False):
+    """Save a setting for future games and apply it to the guild's current game"""
+    setattr(get_settings(guild_id), name, value)
+    game = get_game(guild_id)
+    if game and (not registration_only or game.phase == GamePhase.REGISTRATION):
+        setattr(game.settings, name, value)
+
+
 def create_game(guild_id: int) -> GameState:
-    game = GameState()
+    settings = guild_settings.get(guild_id)
+    game = GameState(settings=replace(settings) if settings else GameSettings())
+    remove_game(guild_id)  # An ended game may still be registered
     active_games[guild_id] = game
     return game
 
 
+def spawn_game_task(game: GameState, coro) -> asyncio.Task:
+    """Run a game coroutine in the background and track it so teardown can cancel it"""
+    task = asyncio.create_task(coro)
+    game.tasks.add(task)
+    
+    def _on_done(t: asyncio.Task):
+        game.tasks.discard(t)
+        if not t.cancelled() and t.exception():
+            logger.error(f"Game task failed: {t.exception()}", exc_info=t.exception())
+    
+    task.add_done_callback(_on_done)
+    return task
+
+
+async def cancel_game_tasks(game: GameState):
+    """Cancel all in-flight phase tasks of a game and wait for them to finish"""
+    current = asyncio.current_task()
+    tasks = [t for t in game.tasks if t is not current]
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
 async def safe_voice_connect(channel: discord.VoiceChannel, guild: discord.Guild, skip_if_error: bool = True) -> tuple[bool, Optional[discord.VoiceClient]]:
     """
     Safely connect to a voice channel with robust error handling.
@@ -348,7 +548,7 @@ async def safe_voice_connect(channel: discord.VoiceChannel, guild: discord.Guild
             if vc:
                 try:
                     await vc.disconnect(force=True)
-                except:
+                except Exception:
                     pass
             return False, None
             
@@ -361,7 +561,7 @@ async def safe_voice_connect(channel: discord.VoiceChannel, guild: discord.Guild
         if guild.voice_client:
             try:
                 await guild.voice_client.disconnect(force=True)
-            except:
+            except Exception:
                 pass
         return False, None
     except Exception as e:
@@ -386,6 +586,29 @@ def create_progress_bar(current: int, total: int, length: int = 8) -> str:
     return "█" * filled + "░" * (length - filled)
 
 
+async def _safe_edit_mute(player: Player, mute: bool):
+    """Server-mute or unmute a player, logging instead of raising on failure"""
+    try:
+        await player.member.edit(mute=mute)
+    except discord.errors.Forbidden:
+        logger.warning(f"No permission to {'mute' if mute else 'unmute'} {player.name}")
+    except Exception as e:
+        logger.warning(f"Failed to {'mute' if mute else 'unmute'} {player.name}: {e}")
+
+
+async def _send_dm(member, *args, **kwargs):
+    """DM a member, logging instead of raising when Discord rejects it"""
+    try:
+        await member.send(*args, **kwargs)
+    except discord.errors.HTTPException as e:  # Includes Forbidden (DMs closed)
+        logger.debug(f"DM failed for {member.display_name}: {e}")
+
+
+def tally(votes: Dict[int, Optional[int]]) -> List[Tuple[int, int]]:
+    """Count votes per target, most voted first (None votes are ignored)"""
+    return Counter(v for v in votes.values() if v is not None).most_common()
+
+
 # ==================== SETTINGS MODALS ====================
 
 class SettingsModal(ui.Modal, title="⚙️ Game Settings"):
@@ -449,9 +672,9 @@ class SettingsModal(ui.Modal, title="⚙️ Game Settings"):
             await interaction.response.send_message("✅ Settings updated!", ephemeral=True)
             if game.registration_message:
                 try:
-                    view = RegistrationView(self.guild_id, game.host_id)
+                    view = RegistrationView(self.guild_id, game.host_id, game)
                     await view.update_registration_embed(game)
-                except:
+                except Exception:
                     pass
 
 
@@ -498,9 +721,9 @@ class RevealModeSelect(ui.Select):
         # Update registration embed
         if game.registration_message:
             try:
-                reg_view = RegistrationView(self.guild_id, game.host_id)
+                reg_view = RegistrationView(self.guild_id, game.host_id, game)
                 await reg_view.update_registration_embed(game)
-            except:
+            except Exception:
                 pass
 
 
@@ -595,30 +818,51 @@ class RoleSettingsModal(ui.Modal, title="👥 Role Settings"):
             # Update the registration embed
             if game.registration_message:
                 try:
-                    view = RegistrationView(self.guild_id, game.host_id)
+                    view = RegistrationView(self.guild_id, game.host_id, game)
                     await view.update_registration_embed(game)
-                except:
+                except Exception:
                     pass
 
 
 # ==================== REGISTRATION BUTTONS ====================
 
 class RegistrationView(ui.View):
-    def __init__(self, guild_id: int, host_id: int):
+    def __init__(self, guild_id: int, host_id: int, game: GameState):
         super().__init__(timeout=None)
         self.guild_id = guild_id
         self.host_id = host_id
+        self.game = game
+        self._player_list_cache: List[str] = []  # "• name" lines, updated on join/leave
+        self._last_embed_hash: Optional[int] = None  # Hash of the last embed we sent
+        self._pending_update: Optional[asyncio.Task] = None
+    
+    def schedule_registration_update(self, game: GameState):
+        """Coalesce bursts of join/leave clicks into a single embed edit"""
+        if self._pending_update and not self._pending_update.done():
+            return
+        
+        async def _debounced_update():
+            await asyncio.sleep(0.5)
+            # Clicks from here on schedule a fresh update
+            self._pending_update = None
+            await self.update_registration_embed(game)
+        
+        self._pending_update = spawn_game_task(game, _debounced_update())
     
     async def update_registration_embed(self, game: GameState):
         """Update the registration message with current player list and settings"""
         try:
             if game.registration_message:
-                if game.players:
-                    player_list = "\n".join([f"• {p.name}" for p in game.players.values()])
+                # Rebuild only if out of sync (e.g. a fresh view created by a settings modal)
+                if len(self._player_list_cache) != len(game.players):
+                    self._player_list_cache = [f"• {p.name}" for p in game.players.values()]
+                
+                if self._player_list_cache:
+                    player_list = "\n".join(self._player_list_cache)
                 else:
                     player_list = "*No players yet*"
                 
-                min_players = game.settings.num_mafia + game.settings.num_doctor + game.settings.num_police + 1
+                min_players = game.settings.min_players
                 
                 # Build settings display
                 reveal_labels = {1: "Hidden", 2: "Mafia/Not", 3: "Full Role"}
@@ -639,15 +883,22 @@ class RegistrationView(ui.View):
                 embed.add_field(name="📋 Requirements", value=f"Minimum **{min_players}** players", inline=False)
                 embed.add_field(name="⚙️ Current Settings", value=settings_text, inline=False)
                 embed.set_footer(text="Host: Use ⚙️ Settings or 👥 Roles buttons to customize")
+                
+                # Nothing changed since the last edit, skip the API call
+                embed_hash = hash(json.dumps(embed.to_dict(), sort_keys=True))
+                if embed_hash == self._last_embed_hash:
+                    return
+                
                 await game.registration_message.edit(embed=embed, view=self)
+                self._last_embed_hash = embed_hash
         except Exception as e:
             logger.error(f"Failed to update registration embed: {e}")
     
     @ui.button(label="Join", style=discord.ButtonStyle.green, custom_id="join_mafia_game", row=0)
     async def join_button(self, interaction: discord.Interaction, button: ui.Button):
         try:
-            game = get_game(self.guild_id)
-            if not game or game.phase != GamePhase.REGISTRATION:
+            game = self.game
+            if game.phase != GamePhase.REGISTRATION:
                 await interaction.response.send_message("No game is currently accepting players!", ephemeral=True)
                 return
             
@@ -656,11 +907,12 @@ class RegistrationView(ui.View):
                 return
             
             player = Player(member=interaction.user, name=interaction.user.display_name)
-            game.players[interaction.user.id] = player
+            game.add_player(player)
+            self._player_list_cache.append(f"• {player.name}")
             logger.info(f"Player {interaction.user.display_name} joined game in guild {self.guild_id}")
             
             await interaction.response.send_message(f"✅ You've joined the game as **{player.name}**!", ephemeral=True)
-            await self.update_registration_embed(game)
+            self.schedule_registration_update(game)
         except Exception as e:
             logger.error(f"Error in join_button: {e}")
             await interaction.response.send_message("❌ An error occurred. Please try again.", ephemeral=True)
@@ -668,22 +920,26 @@ class RegistrationView(ui.View):
     @ui.button(label="Leave", style=discord.ButtonStyle.danger, custom_id="leave_mafia_game", row=0)
     async def leave_button(self, interaction: discord.Interaction, button: ui.Button):
         try:
-            game = get_game(self.guild_id)
-            if not game or game.phase != GamePhase.REGISTRATION:
+            game = self.game
+            if game.phase != GamePhase.REGISTRATION:
                 await interaction.response.send_message("No game is currently in registration!", ephemeral=True)
                 return
             
-            if interaction.user.id not in game.players:
+            # Remove player
+            player = game.remove_player(interaction.user.id)
+            if player is None:
                 await interaction.response.send_message("You're not in the game!", ephemeral=True)
                 return
             
-            # Remove player
-            player_name = game.players[interaction.user.id].name
-            del game.players[interaction.user.id]
+            player_name = player.name
+            try:
+                self._player_list_cache.remove(f"• {player_name}")
+            except ValueError:
+                pass  # Cache is rebuilt on the next update
             logger.info(f"Player {player_name} left game in guild {self.guild_id}")
             
             await interaction.response.send_message(f"👋 You've left the game, **{player_name}**!", ephemeral=True)
-            await self.update_registration_embed(game)
+            self.schedule_registration_update(game)
         except Exception as e:
             logger.error(f"Error in leave_button: {e}")
             await interaction.response.send_message("❌ An error occurred. Please try again.", ephemeral=True)
@@ -692,8 +948,8 @@ class RegistrationView(ui.View):
     async def settings_button(self, interaction: discord.Interaction, button: ui.Button):
         """Open time settings modal"""
         try:
-            game = get_game(self.guild_id)
-            if not game or game.phase != GamePhase.REGISTRATION:
+            game = self.game
+            if game.phase != GamePhase.REGISTRATION:
                 await interaction.response.send_message("❌ No game in registration!", ephemeral=True)
                 return
             
@@ -715,8 +971,8 @@ class RegistrationView(ui.View):
     async def roles_button(self, interaction: discord.Interaction, button: ui.Button):
         """Open role settings modal"""
         try:
-            game = get_game(self.guild_id)
-            if not game or game.phase != GamePhase.REGISTRATION:
+            game = self.game
+            if game.phase != GamePhase.REGISTRATION:
                 await interaction.response.send_message("❌ No game in registration!", ephemeral=True)
                 return
             
@@ -737,8 +993,8 @@ class RegistrationView(ui.View):
     async def reveal_button(self, interaction: discord.Interaction, button: ui.Button):
         """Open reveal mode dropdown"""
         try:
-            game = get_game(self.guild_id)
-            if not game or game.phase != GamePhase.REGISTRATION:
+            game = self.game
+            if game.phase != GamePhase.REGISTRATION:
                 await interaction.response.send_message("❌ No game in registration!", ephemeral=True)
                 return
             
@@ -758,8 +1014,8 @@ class RegistrationView(ui.View):
     @ui.button(label="Start", style=discord.ButtonStyle.primary, custom_id="start_mafia_game", row=0)
     async def start_button(self, interaction: discord.Interaction, button: ui.Button):
         try:
-            game = get_game(self.guild_id)
-            if not game or game.phase != GamePhase.REGISTRATION:
+            game = self.game
+            if game.phase != GamePhase.REGISTRATION:
                 await interaction.response.send_message("No game is currently in registration!", ephemeral=True)
                 return
             
@@ -771,7 +1027,7 @@ class RegistrationView(ui.View):
                 await interaction.response.send_message("❌ Only the game host or an admin can start the game!", ephemeral=True)
                 return
             
-            min_players = game.settings.num_mafia + game.settings.num_doctor + game.settings.num_police + 1
+            min_players = game.settings.min_players
             
             if len(game.players) < min_players:
                 await interaction.response.send_message(
@@ -791,7 +1047,7 @@ class RegistrationView(ui.View):
             # Assign roles and start
             await assign_roles(game)
             await asyncio.sleep(3)
-            await start_night_phase(game)
+            spawn_game_task(game, start_night_phase(game))
         except Exception as e:
             logger.error(f"Error in start_button: {e}")
             await interaction.response.send_message("❌ An error occurred while starting the game.", ephemeral=True)
@@ -799,8 +1055,8 @@ class RegistrationView(ui.View):
     @ui.button(label="Exit", style=discord.ButtonStyle.danger, custom_id="end_mafia_game", row=2)
     async def end_button(self, interaction: discord.Interaction, button: ui.Button):
         try:
-            game = get_game(self.guild_id)
-            if not game:
+            game = self.game
+            if game.phase == GamePhase.ENDED:
                 await interaction.response.send_message("No active game!", ephemeral=True)
                 return
             
@@ -814,26 +1070,24 @@ class RegistrationView(ui.View):
             
             game.phase = GamePhase.ENDED
             
+            # Respond first so the click is acknowledged within Discord's interaction window
+            await interaction.response.send_message("🛑 **Game has been ended by the host.**")
+            await cancel_game_tasks(game)
+            
             # Disable all buttons
             for item in self.children:
                 item.disabled = True
             if game.registration_message:
                 await game.registration_message.edit(view=self)
             
-            await interaction.response.send_message("🛑 **Game has been ended by the host.**")
-            
             # Unmute all players
-            for player in game.players.values():
-                if hasattr(player.member, 'voice') and player.member.voice:
-                    try:
-                        await player.member.edit(mute=False)
-                    except:
-                        pass
+            await asyncio.gather(*(
+                _safe_edit_mute(player, False) for player in game.players.values() if player.member.voice
+            ))
             
             # Clean up
             await delete_game_messages(game)
-            if self.guild_id in active_games:
-                del active_games[self.guild_id]
+            remove_game(self.guild_id, game)
             
             logger.info(f"Game ended by {interaction.user.display_name} in guild {self.guild_id}")
         except Exception as e:
@@ -853,9 +1107,9 @@ class VotingView(ui.View):
         super().__init__(timeout=timeout)
         self.game = game
         
-        # Add player buttons
-        alive_players = [p for p in game.players.values() if p.is_alive]
-        for player in alive_players:
+        # Add player buttons in join order
+        alive_ids = game.alive_ids
+        for player in (p for p in game.players.values() if p.member.id in alive_ids):
             button = ui.Button(
                 label=player.name,
                 style=discord.ButtonStyle.primary,
@@ -895,6 +1149,7 @@ class VotingView(ui.View):
                 await interaction.response.send_message(f"🔄 Changed from skip to **{target_name}**", ephemeral=True)
             else:
                 await interaction.response.send_message(f"✅ You voted for **{target_name}**", ephemeral=True)
+            check_all_votes_in(self.game)
         
         return callback
     
@@ -917,6 +1172,7 @@ class VotingView(ui.View):
             await interaction.response.send_message(f"🔄 Changed vote from **{old_target}** to **skip**", ephemeral=True)
         else:
             await interaction.response.send_message("✅ You chose to **skip** this vote", ephemeral=True)
+        check_all_votes_in(self.game)
 
 
 # ==================== MAFIA TARGET SELECT ====================
@@ -926,11 +1182,8 @@ class MafiaTargetSelect(ui.Select):
         self.game = game
         self.mafia_player = mafia_player
         
-        options = [
-            discord.SelectOption(label=p.name, value=str(p.member.id))
-            for p in game.players.values()
-            if p.is_alive and p.role != Role.MAFIA
-        ]
+        # Shared across all mafia views, so copy before appending the skip option
+        options = list(game.night_target_options)
         
         # Add skip option if mafia has skips remaining
         skips_remaining = game.settings.mafia_skip_kills - game.mafia_skips_used
@@ -988,18 +1241,14 @@ class MafiaConfirmView(ui.View):
         if self.target_id is None:
             self.game.mafia_votes[player_id] = -1
             await interaction.response.edit_message(content="⏭️ Confirmed: **skip the kill** tonight.", view=None)
-            for p in self.game.players.values():
-                if p.role == Role.MAFIA and p.member.id != player_id and p.is_alive:
-                    try: await p.member.send(f"⏭️ **{self.mafia_player.name}** voted to **skip the kill** tonight.")
-                    except: pass
+            content = f"⏭️ **{self.mafia_player.name}** voted to **skip the kill** tonight."
+            await asyncio.gather(*(_send_dm(self.game.players[i].member, content) for i in self.game.mafia_ids - {player_id}))
         else:
             self.game.mafia_votes[player_id] = self.target_id
             target_name = self.game.players[self.target_id].name
             await interaction.response.edit_message(content=f"🔪 Confirmed: eliminate **{target_name}**.", view=None)
-            for p in self.game.players.values():
-                if p.role == Role.MAFIA and p.member.id != player_id and p.is_alive:
-                    try: await p.member.send(f"🔪 **{self.mafia_player.name}** voted to eliminate **{target_name}**")
-                    except: pass
+            content = f"🔪 **{self.mafia_player.name}** voted to eliminate **{target_name}**"
+            await asyncio.gather(*(_send_dm(self.game.players[i].member, content) for i in self.game.mafia_ids - {player_id}))
 
         self.game.night_actions_submitted.add(player_id)
         self.game.night_actions_received += 1
@@ -1008,9 +1257,8 @@ class MafiaConfirmView(ui.View):
             item.disabled = True
             item.placeholder = "✅ Choice locked in"
         try: await interaction.message.edit(view=None)
-        except: pass
-        try: await self.mafia_player.member.send("✅ Your night action is locked in.")
-        except: pass
+        except Exception: pass
+        await _send_dm(self.mafia_player.member, "✅ Your night action is locked in.")
         await check_all_night_actions_done(self.game)
 
     @ui.button(label="❌ Cancel", style=discord.ButtonStyle.secondary)
@@ -1031,13 +1279,12 @@ class DoctorSaveSelect(ui.Select):
         self.game = game
         self.doctor_player = doctor_player
         
-        options = []
-        for p in game.players.values():
-            if p.is_alive:
-                # If it's the doctor themselves and they used self-save last round, skip
-                if p.member.id == doctor_player.member.id and doctor_player.doctor_self_save_used:
-                    continue
-                options.append(discord.SelectOption(label=p.name, value=str(p.member.id)))
+        # If the doctor used self-save last round, they can't pick themselves
+        if doctor_player.doctor_self_save_used:
+            self_id = doctor_player.member.id
+            options = [opt for i, opt in game.night_option_cache.items() if i != self_id]
+        else:
+            options = list(game.night_option_cache.values())
         
         super().__init__(placeholder="Select who to save...", options=options if options else [discord.SelectOption(label="No one", value="none")])
     
@@ -1099,9 +1346,8 @@ class DoctorConfirmView(ui.View):
             item.disabled = True
             item.placeholder = "✅ Choice locked in"
         try: await interaction.message.edit(view=None)
-        except: pass
-        try: await self.doctor_player.member.send("✅ Your night action is locked in.")
-        except: pass
+        except Exception: pass
+        await _send_dm(self.doctor_player.member, "✅ Your night action is locked in.")
         await check_all_night_actions_done(self.game)
 
     @ui.button(label="❌ Cancel", style=discord.ButtonStyle.secondary)
@@ -1122,11 +1368,8 @@ class PoliceInvestigateSelect(ui.Select):
         self.game = game
         self.police_player = police_player
         
-        options = [
-            discord.SelectOption(label=p.name, value=str(p.member.id))
-            for p in game.players.values()
-            if p.is_alive and p.member.id != police_player.member.id
-        ]
+        self_id = police_player.member.id
+        options = [opt for i, opt in game.night_option_cache.items() if i != self_id]
         
         super().__init__(placeholder="Select who to investigate...", options=options)
     
@@ -1177,9 +1420,8 @@ class PoliceConfirmView(ui.View):
             item.disabled = True
             item.placeholder = "✅ Investigation complete"
         try: await interaction.message.edit(view=None)
-        except: pass
-        try: await self.police_player.member.send("✅ Your night action is locked in.")
-        except: pass
+        except Exception: pass
+        await _send_dm(self.police_player.member, "✅ Your night action is locked in.")
         await check_all_night_actions_done(self.game)
 
     @ui.button(label="❌ Cancel", style=discord.ButtonStyle.secondary)
@@ -1225,12 +1467,12 @@ class NightEndView(ui.View):
             logger.info(f"Night ended manually by {interaction.user.display_name}")
             
             # Process night results
-            await process_night_results(self.game)
+            spawn_game_task(self.game, process_night_results(self.game))
         except Exception as e:
             logger.error(f"Error in end_night_button: {e}")
             try:
                 await interaction.response.send_message("❌ An error occurred.", ephemeral=True)
-            except:
+            except Exception:
                 pass
 
 
@@ -1258,7 +1500,7 @@ class DiscussionEndView(ui.View):
                     await self.discussion_message.edit(
                         content=f"💬 **Discussion time!** ⏱️ **{format_time(remaining)}** remaining\nHost can also click **🗳️ Start Voting** to skip."
                     )
-                except:
+                except Exception:
                     pass
             # Warning at 10 seconds
             if remaining == 10 and self.discussion_message:
@@ -1266,7 +1508,7 @@ class DiscussionEndView(ui.View):
                     await self.discussion_message.edit(
                         content=f"💬 **Discussion time!** ⏱️ **10s** remaining — voting starts soon!"
                     )
-                except:
+                except Exception:
                     pass
         
         # Timer expired — auto-start voting
@@ -1277,7 +1519,7 @@ class DiscussionEndView(ui.View):
             if self.discussion_message:
                 try:
                     await self.discussion_message.edit(content="⏰ **Discussion time is over!**", view=self)
-                except:
+                except Exception:
                     pass
             logger.info("Discussion ended by timer")
             await start_voting_phase(self.game)
@@ -1302,12 +1544,12 @@ class DiscussionEndView(ui.View):
             await interaction.response.edit_message(view=self)
             
             logger.info(f"Voting started manually by {interaction.user.display_name}")
-            await start_voting_phase(self.game)
+            spawn_game_task(self.game, start_voting_phase(self.game))
         except Exception as e:
             logger.error(f"Error in start_voting_button: {e}")
             try:
                 await interaction.response.send_message("❌ An error occurred.", ephemeral=True)
-            except:
+            except Exception:
                 pass
 
 
@@ -1341,12 +1583,12 @@ class NextRoundView(ui.View):
             logger.info(f"Next night started manually by {interaction.user.display_name}")
             
             # Start next night
-            await start_night_phase(self.game)
+            spawn_game_task(self.game, start_night_phase(self.game))
         except Exception as e:
             logger.error(f"Error in start_night_button: {e}")
             try:
                 await interaction.response.send_message("❌ An error occurred.", ephemeral=True)
-            except:
+            except Exception:
                 pass
 
 
@@ -1354,12 +1596,8 @@ class NextRoundView(ui.View):
 
 async def relay_mafia_message(game: GameState, sender: Player, message: str):
     """Relay message from one mafia to all other mafias"""
-    for player in game.players.values():
-        if player.role == Role.MAFIA and player.member.id != sender.member.id and player.is_alive:
-            try:
-                await player.member.send(f"🗣️ **{sender.name}** (Mafia): {message}")
-            except:
-                pass
+    content = f"🗣️ **{sender.name}** (Mafia): {message}"
+    await asyncio.gather(*(_send_dm(game.players[i].member, content) for i in game.mafia_ids - {sender.member.id}))
 
 
 # ==================== GAME LOGIC ====================
@@ -1367,40 +1605,31 @@ async def relay_mafia_message(game: GameState, sender: Player, message: str):
 async def assign_roles(game: GameState):
     """Assign roles to all players"""
     player_list = list(game.players.values())
-    random.shuffle(player_list)
+    settings = game.settings
+    num_special = min(settings.num_mafia + settings.num_doctor + settings.num_police, len(player_list))
+    specials = random.sample(player_list, num_special)
     
-    idx = 0
-    
-    # Assign Mafia
-    for _ in range(game.settings.num_mafia):
-        if idx < len(player_list):
-            player_list[idx].role = Role.MAFIA
-            idx += 1
-    
-    # Assign Doctor
-    for _ in range(game.settings.num_doctor):
-        if idx < len(player_list):
-            player_list[idx].role = Role.DOCTOR
-            idx += 1
-    
-    # Assign Police
-    for _ in range(game.settings.num_police):
-        if idx < len(player_list):
-            player_list[idx].role = Role.POLICE
-            idx += 1
-    
-    # Rest are Citizens
-    for i in range(idx, len(player_list)):
-        player_list[i].role = Role.CITIZEN
+    # Test commands can re-assign roles, so clear the previous ones
+    for player in player_list:
+        player.role = Role.CITIZEN
+    
+    # First picks are Mafia, then Doctor, then Police; the rest stay Citizens.
+    # The alive indexes for the night and voting views are filled in the same pass
+    game.alive_ids = {p.member.id for p in player_list if p.is_alive}
+    game.mafia_ids, game.doctor_ids, game.police_ids = set(), set(), set()
+    role_ids = {Role.MAFIA: game.mafia_ids, Role.DOCTOR: game.doctor_ids, Role.POLICE: game.police_ids}
+    roles = ([Role.MAFIA] * settings.num_mafia
+             + [Role.DOCTOR] * settings.num_doctor
+             + [Role.POLICE] * settings.num_police)
+    for player, role in zip(specials, roles):
+        player.role = role
+        if player.is_alive:
+            role_ids[role].add(player.member.id)
+    for player_id in game.mafia_ids:
+        mafia_games[player_id] = game
+    game.roles_assigned = True
     
     # DM each player their role with enhanced formatting
-    role_icons = {
-        Role.CITIZEN: "🧑‍🤝‍🧑",
-        Role.MAFIA: "🔪",
-        Role.DOCTOR: "💉",
-        Role.POLICE: "🔍"
-    }
-    
     role_tips = {
         Role.CITIZEN: "💡 **Quick Tips:**\n• Watch for suspicious behavior\n• Note who accuses whom\n• Trust your instincts!",
         Role.MAFIA: "💡 **Quick Tips:**\n• Blend in with citizens\n• Coordinate with fellow Mafia via DM\n• Create alibis during the day",
@@ -1408,9 +1637,13 @@ async def assign_roles(game: GameState):
         Role.POLICE: "💡 **Quick Tips:**\n• Investigate suspicious players\n• Be careful revealing findings\n• Share info wisely to avoid being targeted"
     }
     
+    # Fellow mafia are listed in join order
+    mafia_players = [p for p in player_list if p.member.id in game.mafia_ids]
+    
+    dms = []
     for player in player_list:
         role_desc = get_role_description(player.role)
-        icon = role_icons.get(player.role, "🎭")
+        icon = ROLE_ICONS.get(player.role, "🎭")
         tips = role_tips.get(player.role, "")
         
         embed = discord.Embed(
@@ -1425,7 +1658,7 @@ async def assign_roles(game: GameState):
         
         # If mafia, tell them who other mafias are
         if player.role == Role.MAFIA:
-            other_mafia = [p.name for p in player_list if p.role == Role.MAFIA and p.member.id != player.member.id]
+            other_mafia = [p.name for p in mafia_players if p is not player]
             if other_mafia:
                 embed.add_field(name="🔪 Fellow Mafia", value="\n".join([f"• {name}" for name in other_mafia]), inline=False)
             else:
@@ -1433,11 +1666,10 @@ async def assign_roles(game: GameState):
         
         # Add player count
         embed.set_footer(text=f"👥 {len(player_list)} players in this game")
-        
-        try:
-            await player.member.send(embed=embed)
-        except:
-            pass
+        dms.append((player.member, embed))
+    
+    # Send all role DMs concurrently, each goes to a different recipient
+    await asyncio.gather(*(_send_dm(member, embed=embed) for member, embed in dms))
 
 
 def get_role_description(role: Role) -> str:
@@ -1467,6 +1699,7 @@ async def check_all_night_actions_done(game: GameState):
     
     if game.night_actions_received >= game.night_actions_expected:
         game.night_auto_end_triggered = True
+        game.night_actions_done.set()  # Wake start_night_phase so it stops waiting
         
         # Fire off the delayed processing as a background task
         # so the interaction callback returns immediately
@@ -1482,7 +1715,13 @@ async def check_all_night_actions_done(game: GameState):
             except Exception as e:
                 logger.error(f"Error in delayed night end: {e}", exc_info=True)
         
-        asyncio.create_task(_delayed_night_end())
+        spawn_game_task(game, _delayed_night_end())
+
+
+def check_all_votes_in(game: GameState):
+    """Let the voting countdown finish early once every alive player has voted"""
+    if game.phase == GamePhase.VOTING and game.alive_ids <= game.day_votes.keys():
+        game.voting_done.set()
 
 
 async def start_night_phase(game: GameState):
@@ -1491,6 +1730,7 @@ async def start_night_phase(game: GameState):
     if game.phase == GamePhase.ENDED:
         return
     
+    test_mode = game.settings.test_mode
     game.phase = GamePhase.NIGHT
     game.round_number += 1
     game.mafia_votes.clear()
@@ -1499,11 +1739,18 @@ async def start_night_phase(game: GameState):
     game.police_investigation = None
     game.night_actions_submitted.clear()
     
+    # Build dropdown options once in join order, shared by every mafia/doctor/police view tonight
+    alive_ids, mafia_ids = game.alive_ids, game.mafia_ids
+    game.night_option_cache = {
+        i: discord.SelectOption(label=p.name, value=str(i)) for i, p in game.players.items() if i in alive_ids
+    }
+    game.night_target_options = [opt for i, opt in game.night_option_cache.items() if i not in mafia_ids]
+    
     # Play "Night Has Come" announcement
     await play_announcement(game, "night_has_come")
     
     # Calculate game stats
-    alive_count = sum(1 for p in game.players.values() if p.is_alive)
+    alive_count = len(game.alive_ids)
     dead_count = len(game.players) - alive_count
     
     # Announce night in text with game status
@@ -1519,14 +1766,16 @@ async def start_night_phase(game: GameState):
     # Reset night action tracking
     game.night_actions_received = 0
     game.night_auto_end_triggered = False
+    game.night_actions_done.clear()
     
-    # Calculate expected night actions
-    alive_mafia = [p for p in game.players.values() if p.role == Role.MAFIA and p.is_alive]
-    alive_doctors = [p for p in game.players.values() if p.role == Role.DOCTOR and p.is_alive]
-    alive_police = [p for p in game.players.values() if p.role == Role.POLICE and p.is_alive]
+    # Calculate expected night actions (join order keeps test-mode picks reproducible)
+    alive_players = [p for i, p in game.players.items() if i in alive_ids]
+    alive_mafia = [p for p in alive_players if p.member.id in mafia_ids]
+    alive_doctors = [p for p in alive_players if p.member.id in game.doctor_ids]
+    alive_police = [p for p in alive_players if p.member.id in game.police_ids]
     
     # Count expected actions (only from real players, not bots in test mode)
-    if game.settings.test_mode:
+    if test_mode:
         real_mafia = [p for p in alive_mafia if not isinstance(p.member, DummyMember)]
         real_doctors = [p for p in alive_doctors if not isinstance(p.member, DummyMember)]
         real_police = [p for p in alive_police if not isinstance(p.member, DummyMember)]
@@ -1535,34 +1784,26 @@ async def start_night_phase(game: GameState):
         game.night_actions_expected = len(alive_mafia) + len(alive_doctors) + len(alive_police)
     
     # Mute all alive players during night
-    for player in game.players.values():
-        if player.is_alive and hasattr(player.member, 'voice') and player.member.voice:
-            try:
-                await player.member.edit(mute=True)
-            except discord.errors.Forbidden:
-                logger.warning(f"No permission to mute {player.name}")
-            except Exception as e:
-                logger.warning(f"Failed to mute {player.name}: {e}")
-    
-    # Mafia selection
+    await asyncio.gather(*(
+        _safe_edit_mute(player, True) for player in game.players.values()
+        if player.is_alive and player.member.voice
+    ))
+    
+    # Mafia selection (one embed shared by every mafia, views are per player)
+    dms = []
+    mafia_embed = discord.Embed(
+        title="🔪 Mafia Night Action",
+        description="Choose your target to eliminate.\n\nYou can also type messages here to communicate with other Mafia members.",
+        color=discord.Color.red()
+    )
     for mafia in alive_mafia:
-        try:
-            view = MafiaTargetView(game, mafia)
-            embed = discord.Embed(
-                title="🔪 Mafia Night Action",
-                description="Choose your target to eliminate.\n\nYou can also type messages here to communicate with other Mafia members.",
-                color=discord.Color.red()
-            )
-            await mafia.member.send(embed=embed, view=view)
-        except:
-            pass
+        dms.append((mafia.member, mafia_embed, MafiaTargetView(game, mafia)))
     
     # In test mode, auto-target a random non-mafia player for bot mafia
-    if game.settings.test_mode:
+    if test_mode:
         bot_mafia = [p for p in alive_mafia if isinstance(p.member, DummyMember)]
         if bot_mafia:
-            possible_targets = [p for p in game.players.values() 
-                              if p.is_alive and p.role != Role.MAFIA]
+            possible_targets = [p for p in alive_players if p.member.id not in mafia_ids]
             if possible_targets:
                 target = random.choice(possible_targets)
                 for mafia in bot_mafia:
@@ -1571,47 +1812,43 @@ async def start_night_phase(game: GameState):
                 await send_game_message(game, content=f"🤖 *(Test Mode) Bot Mafia auto-targeted **{target.name}***")
     
     # Doctor selection
+    doctor_embed = discord.Embed(
+        title="💉 Doctor Night Action",
+        description="Choose who to save tonight.",
+        color=discord.Color.blue()
+    )
+    self_saved_embed = doctor_embed.copy().add_field(
+        name="⚠️ Note", value="You saved yourself last round, so you cannot save yourself this round.", inline=False
+    )
     for doctor in alive_doctors:
-        try:
-            view = DoctorSaveView(game, doctor)
-            embed = discord.Embed(
-                title="💉 Doctor Night Action",
-                description="Choose who to save tonight.",
-                color=discord.Color.blue()
-            )
-            if doctor.doctor_self_save_used:
-                embed.add_field(name="⚠️ Note", value="You saved yourself last round, so you cannot save yourself this round.", inline=False)
-            await doctor.member.send(embed=embed, view=view)
-        except:
-            pass
+        embed = self_saved_embed if doctor.doctor_self_save_used else doctor_embed
+        dms.append((doctor.member, embed, DoctorSaveView(game, doctor)))
     
     # Police investigation
+    police_embed = discord.Embed(
+        title="🔍 Police Night Action",
+        description="Choose who to investigate tonight.",
+        color=discord.Color.gold()
+    )
     for police in alive_police:
-        try:
-            view = PoliceInvestigateView(game, police)
-            embed = discord.Embed(
-                title="🔍 Police Night Action",
-                description="Choose who to investigate tonight.",
-                color=discord.Color.gold()
-            )
-            await police.member.send(embed=embed, view=view)
-        except:
-            pass
+        dms.append((police.member, police_embed, PoliceInvestigateView(game, police)))
+    
+    # Send all night action DMs concurrently, each view belongs to one player
+    await asyncio.gather(*(_send_dm(member, embed=embed, view=view) for member, embed, view in dms))
     
     # In test mode, auto-act for bot doctors and police
-    if game.settings.test_mode:
+    if test_mode:
         bot_doctors = [p for p in alive_doctors if isinstance(p.member, DummyMember)]
         for doctor in bot_doctors:
-            possible_saves = [p for p in game.players.values() if p.is_alive]
-            if possible_saves:
-                save_target = random.choice(possible_saves)
+            if alive_players:
+                save_target = random.choice(alive_players)
                 game.doctor_save = save_target.member.id
                 game.night_actions_received += 1
                 await send_game_message(game, content=f"🤖 *(Test Mode) Bot Doctor auto-saved **{save_target.name}***")
         
         bot_police = [p for p in alive_police if isinstance(p.member, DummyMember)]
         for police_p in bot_police:
-            possible_targets = [p for p in game.players.values() if p.is_alive and p.member.id != police_p.member.id]
+            possible_targets = [p for p in alive_players if p is not police_p]
             if possible_targets:
                 investigate_target = random.choice(possible_targets)
                 game.police_investigation = investigate_target.member.id
@@ -1620,8 +1857,7 @@ async def start_night_phase(game: GameState):
                 result_text = "IS MAFIA" if is_mafia else "NOT Mafia"
                 await send_game_message(game, content=f"🤖 *(Test Mode) Bot Police investigated **{investigate_target.name}** — {result_text}*")
     
-    # Poll every 30 seconds — remind players who haven't chosen yet
-    time_waited = 0
+    # Wait for the night actions, reminding players who haven't chosen yet every 30 seconds
     while game.phase == GamePhase.NIGHT and not game.night_auto_end_triggered:
         if game.night_actions_received >= game.night_actions_expected:
             game.night_auto_end_triggered = True
@@ -1634,25 +1870,17 @@ async def start_night_phase(game: GameState):
             await process_night_results(game)
             return
         
-        await asyncio.sleep(2)
-        time_waited += 2
-        
-        # Every 30 seconds, remind players who haven't submitted
-        if time_waited % 30 == 0 and time_waited > 0:
-            pending = game.night_actions_expected - game.night_actions_received
-            # DM reminder to players who haven't submitted
-            for player in game.players.values():
-                if not player.is_alive:
-                    continue
-                if player.member.id in game.night_actions_submitted:
-                    continue
-                if isinstance(player.member, DummyMember):
-                    continue
-                if player.role in (Role.MAFIA, Role.DOCTOR, Role.POLICE):
-                    try:
-                        await player.member.send(f"⏰ **Reminder:** Please make your night action choice! The game is waiting for you.")
-                    except:
-                        pass
+        try:
+            await asyncio.wait_for(game.night_actions_done.wait(), timeout=30)
+        except asyncio.TimeoutError:
+            # Every 30 seconds, remind players who haven't submitted
+            if game.phase == GamePhase.NIGHT:
+                pending = game.night_actions_expected - game.night_actions_received
+                # DM reminder to alive role players who haven't submitted
+                waiting_ids = (game.mafia_ids | game.doctor_ids | game.police_ids) - game.night_actions_submitted
+                for player in (game.players[i] for i in waiting_ids):
+                    if not isinstance(player.member, DummyMember):
+                        await _send_dm(player.member, f"⏰ **Reminder:** Please make your night action choice! The game is waiting for you.")
 
 
 async def process_night_results(game: GameState):
@@ -1661,13 +1889,11 @@ async def process_night_results(game: GameState):
     
     # Determine mafia target (majority vote among mafia)
     if game.mafia_votes:
-        vote_counts = {}
-        for target_id in game.mafia_votes.values():
-            vote_counts[target_id] = vote_counts.get(target_id, 0) + 1
+        vote_counts = tally(game.mafia_votes)
         
         if vote_counts:
-            max_count = max(vote_counts.values())
-            tied_targets = [t for t, c in vote_counts.items() if c == max_count]
+            max_count = vote_counts[0][1]
+            tied_targets = [t for t, c in vote_counts if c == max_count]
             top_vote = random.choice(tied_targets)
             if top_vote == -1:
                 # Mafia chose to skip
@@ -1689,36 +1915,8 @@ async def process_night_results(game: GameState):
     await start_day_phase(game, saved, mafia_skipped)
 
 
-async def start_day_phase(game: GameState, was_saved: bool, mafia_skipped: bool = False):
-    """Start the day phase"""
-    # Check if game was force stopped
-    if game.phase == GamePhase.ENDED:
-        return
-    
-    game.phase = GamePhase.DAY
-    
-    # Play "Night Is Over" announcement
-    await play_announcement(game, "night_is_over")
-    
-    # Unmute ONLY alive players (dead stay muted throughout the game)
-    for player in game.players.values():
-        if hasattr(player.member, 'voice') and player.member.voice:
-            try:
-                if player.is_alive:
-                    await player.member.edit(mute=False)
-                else:
-                    # Dead players stay muted
-                    await player.member.edit(mute=True)
-            except discord.errors.Forbidden:
-                logger.warning(f"No permission to edit {player.name}")
-            except Exception as e:
-                logger.warning(f"Failed to edit {player.name}: {e}")
-    
-    # Play saved announcement if someone was saved (but don't reveal who)
-    if was_saved:
-        await play_announcement(game, "someone_saved")
-    
-    # Announce day in text
+def build_day_embed(game: GameState, was_saved: bool) -> discord.Embed:
+    """Build the morning announcement embed for the night's outcome"""
     if game.mafia_target:
         target = game.players[game.mafia_target]
         if was_saved:
@@ -1728,7 +1926,6 @@ async def start_day_phase(game: GameState, was_saved: bool, mafia_skipped: bool
                 color=discord.Color.gold()
             )
         else:
-            target.is_alive = False
             reveal_mode = game.settings.role_reveal_mode
 
             if reveal_mode == 1:
@@ -1766,8 +1963,34 @@ async def start_day_phase(game: GameState, was_saved: bool, mafia_skipped: bool
     # Show alive players
     alive_players = [p.name for p in game.players.values() if p.is_alive]
     embed.add_field(name=f"🧍 Alive ({len(alive_players)})", value="\n".join(alive_players), inline=False)
+    return embed
+
+
+async def start_day_phase(game: GameState, was_saved: bool, mafia_skipped: bool = False):
+    """Start the day phase"""
+    # Check if game was force stopped
+    if game.phase == GamePhase.ENDED:
+        return
     
-    await send_game_message(game, embed=embed)
+    game.phase = GamePhase.DAY
+    
+    # Play "Night Is Over" while unmuting ONLY alive players (dead stay muted throughout the game)
+    await asyncio.gather(
+        play_announcement(game, "night_is_over"),
+        *(_safe_edit_mute(player, not player.is_alive) for player in game.players.values()
+          if player.member.voice)
+    )
+    
+    # Play saved announcement if someone was saved (but don't reveal who)
+    if was_saved:
+        await play_announcement(game, "someone_saved")
+    
+    # Apply the night's kill
+    if game.mafia_target and not was_saved:
+        game.kill(game.players[game.mafia_target])
+    
+    # Announce day in text
+    await send_game_message(game, embed=build_day_embed(game, was_saved))
     
     # Check win conditions
     if await check_win_condition(game):
@@ -1783,7 +2006,7 @@ async def start_day_phase(game: GameState, was_saved: bool, mafia_skipped: bool
         view=discussion_view
     )
     discussion_view.discussion_message = disc_msg
-    asyncio.create_task(discussion_view.start_timer())
+    spawn_game_task(game, discussion_view.start_timer())
 
 
 async def start_voting_phase(game: GameState):
@@ -1792,26 +2015,28 @@ async def start_voting_phase(game: GameState):
     if game.phase == GamePhase.ENDED:
         return
     
+    voting_time = game.settings.voting_time
     game.phase = GamePhase.VOTING
     game.day_votes.clear()
+    game.voting_done.clear()
     
     # Play voting announcement
     await play_announcement(game, "voting_time")
     
     embed = discord.Embed(
         title="🗳️ Voting Time",
-        description=f"You have **{game.settings.voting_time}s** to vote.",
+        description=f"You have **{voting_time}s** to vote.",
         color=discord.Color.orange()
     )
     
-    view = VotingView(game, game.settings.voting_time)
+    view = VotingView(game, voting_time)
     await send_game_message(game, embed=embed, view=view)
     
     # In test mode, auto-vote for bot players
     if game.settings.test_mode:
-        alive_bots = [p for p in game.players.values() 
-                     if p.is_alive and isinstance(p.member, DummyMember)]
         alive_players = [p for p in game.players.values() if p.is_alive]
+        alive_bots = [p for p in alive_players if isinstance(p.member, DummyMember)]
+        alive_index = {p.member.id: i for i, p in enumerate(alive_players)}
         
         if alive_bots:
             bot_votes = []
@@ -1820,19 +2045,21 @@ async def start_voting_phase(game: GameState):
                 if random.random() < 0.3:
                     game.day_votes[bot.member.id] = None  # Skip
                     bot_votes.append(f"• {bot.name} → Skip")
-                else:
-                    # Vote for a random alive player (not themselves)
-                    possible_targets = [p for p in alive_players if p.member.id != bot.member.id]
-                    if possible_targets:
-                        target = random.choice(possible_targets)
-                        game.day_votes[bot.member.id] = target.member.id
-                        bot_votes.append(f"• {bot.name} → {target.name}")
+                elif len(alive_players) > 1:
+                    # Vote for a random alive player (not themselves): draw from the
+                    # other slots and step over the bot's own position
+                    pick = random.randrange(len(alive_players) - 1)
+                    if pick >= alive_index[bot.member.id]:
+                        pick += 1
+                    target = alive_players[pick]
+                    game.day_votes[bot.member.id] = target.member.id
+                    bot_votes.append(f"• {bot.name} → {target.name}")
             
             if bot_votes:
                 await send_game_message(game, content=f"🤖 *[Test Mode] Bot votes:*\n" + "\n".join(bot_votes))
+            check_all_votes_in(game)
     
     # Live countdown in text chat
-    voting_time = game.settings.voting_time
     countdown_interval = 10  # Show countdown every 10 seconds
     elapsed = 0
     
@@ -1854,14 +2081,21 @@ async def start_voting_phase(game: GameState):
                 bar = create_progress_bar(remaining, voting_time, 10)
                 await send_game_message(game, content=f"⏱️ {bar} **{remaining}s** remaining")
         
-        # Wait for next tick
+        # Wait for next tick, or stop early once everyone has voted
         wait_time = min(countdown_interval, voting_time - elapsed)
         if wait_time > 0:
-            await asyncio.sleep(wait_time)
+            try:
+                await asyncio.wait_for(game.voting_done.wait(), timeout=wait_time)
+                break
+            except asyncio.TimeoutError:
+                pass
         elapsed += wait_time
     
     # Final message
-    await send_game_message(game, content="⏰ **Time's up!** Votes are being tallied...")
+    if game.voting_done.is_set():
+        await send_game_message(game, content="✅ **Everyone has voted!** Votes are being tallied...")
+    else:
+        await send_game_message(game, content="⏰ **Time's up!** Votes are being tallied...")
     await asyncio.sleep(2)
     
     # Check if game was force stopped during voting
@@ -1878,14 +2112,11 @@ async def process_voting_results(game: GameState):
     if game.phase == GamePhase.ENDED:
         return
     
-    vote_counts: Dict[Optional[int], int] = {}  # target_id -> count (None = skip)
-    
-    alive_players = [p for p in game.players.values() if p.is_alive]
-    
-    # Count votes (players who didn't vote are considered skipped)
-    for player in alive_players:
-        vote = game.day_votes.get(player.member.id, None)  # Default to skip if no vote
-        vote_counts[vote] = vote_counts.get(vote, 0) + 1
+    # Count votes, target_id -> count (players who didn't vote are considered skipped, None)
+    # Tally voters in join order so equal counts keep a stable order in the results
+    alive_ids = game.alive_ids
+    vote_counts = Counter(game.day_votes.get(i) for i in game.players if i in alive_ids)
+    ranked = vote_counts.most_common()
     
     # Display vote results with visual bars
     embed = discord.Embed(
@@ -1894,10 +2125,10 @@ async def process_voting_results(game: GameState):
     )
     
     # Find max votes for scaling bars
-    max_vote_count = max(vote_counts.values()) if vote_counts else 1
+    max_vote_count = ranked[0][1] if ranked else 1
     
     results = []
-    for target_id, count in sorted(vote_counts.items(), key=lambda x: x[1], reverse=True):
+    for target_id, count in ranked:
         bar = create_progress_bar(count, max_vote_count, 10)
         if target_id is None:
             results.append(f"⏭️ Skip {bar} **{count}**")
@@ -1908,21 +2139,21 @@ async def process_voting_results(game: GameState):
     embed.description = "\n".join(results) if results else "No votes cast"
     
     # Find the highest voted (excluding skips for elimination)
-    non_skip_votes = {k: v for k, v in vote_counts.items() if k is not None}
-    skip_votes = vote_counts.get(None, 0)
+    skip_votes = vote_counts.pop(None, 0)
     
-    if non_skip_votes:
-        max_votes = max(non_skip_votes.values())
-        top_voted = [k for k, v in non_skip_votes.items() if v == max_votes]
+    if vote_counts:
+        # The top two counts are enough to spot a tie
+        top_two = vote_counts.most_common(2)
+        eliminated_id, max_votes = top_two[0]
+        is_tie = len(top_two) > 1 and top_two[1][1] == max_votes
         
         # Check if skip has more votes
         if skip_votes > max_votes:
             embed.add_field(name="📢 Result", value="The vote was skipped! No one is eliminated.", inline=False)
             await send_game_message(game, embed=embed)
-        elif len(top_voted) == 1 and max_votes > skip_votes:
-            eliminated_id = top_voted[0]
+        elif not is_tie and max_votes > skip_votes:
             eliminated = game.players[eliminated_id]
-            eliminated.is_alive = False
+            game.kill(eliminated)
             reveal_mode = game.settings.role_reveal_mode
             
             if reveal_mode == 1:
@@ -1971,7 +2202,7 @@ async def process_voting_results(game: GameState):
                 await send_game_message(game, embed=embed)
                 
                 # Count remaining mafia to check if this was the last mafia moment
-                alive_mafia_count = sum(1 for p in game.players.values() if p.is_alive and p.role == Role.MAFIA)
+                alive_mafia_count = len(game.mafia_ids)
                 is_last_mafia_moment = (alive_mafia_count == 0 and eliminated.role == Role.MAFIA) or \
                                        (alive_mafia_count == 1 and eliminated.role != Role.MAFIA) or \
                                        (alive_mafia_count == 0)
@@ -2026,8 +2257,8 @@ async def process_voting_results(game: GameState):
 
 async def check_win_condition(game: GameState) -> bool:
     """Check if the game has ended"""
-    alive_mafia = sum(1 for p in game.players.values() if p.is_alive and p.role == Role.MAFIA)
-    alive_citizens = sum(1 for p in game.players.values() if p.is_alive and p.role != Role.MAFIA)
+    alive_mafia = len(game.mafia_ids)
+    alive_citizens = len(game.alive_ids) - alive_mafia
     
     if alive_mafia == 0:
         # Citizens win - play announcement
@@ -2061,26 +2292,21 @@ async def end_game(game: GameState, embed: discord.Embed):
         logger.info(f"Game ended in guild {game.guild.name if game.guild else 'Unknown'}")
         
         # Reveal all roles
-        role_reveal = []
-        for player in game.players.values():
-            status = "✅" if player.is_alive else "💀"
-            role_reveal.append(f"{status} **{player.name}** - {player.role.value}")
-        
-        embed.add_field(name="🎭 Role Reveal", value="\n".join(role_reveal), inline=False)
+        role_reveal = "\n".join(
+            f"{ALIVE_ICON if player.is_alive else DEAD_ICON} **{player.name}** - {player.role.value}"
+            for player in game.players.values()
+        )
+        embed.add_field(name="🎭 Role Reveal", value=role_reveal, inline=False)
         embed.add_field(name="📊 Stats", value=f"Rounds played: {game.round_number}", inline=False)
         embed.set_footer(text="Game messages will be deleted in 30 seconds...")
         
         final_message = await game.text_channel.send(embed=embed)
         
         # Unmute all players at game end
-        for player in game.players.values():
-            if hasattr(player.member, 'voice') and player.member.voice:
-                try:
-                    await player.member.edit(mute=False)
-                except discord.errors.Forbidden:
-                    logger.warning(f"No permission to unmute {player.name}")
-                except Exception as e:
-                    logger.warning(f"Failed to unmute {player.name}: {e}")
+        await asyncio.gather(*(
+            _safe_edit_mute(player, False) for player in game.players.values()
+            if player.member.voice
+        ))
         
         # Disconnect from voice if connected
         if game.guild:
@@ -2091,62 +2317,48 @@ async def end_game(game: GameState, embed: discord.Embed):
                 except Exception as e:
                     logger.warning(f"Failed to disconnect from voice: {e}")
         
-        # Wait before deleting messages so players can see the results
-        await asyncio.sleep(30)
-        
-        # Delete all game messages
-        await delete_game_messages(game)
-        
-        # Delete the final message too
-        try:
-            await final_message.delete()
-        except:
-            pass
-        
-        # Remove game from active games
-        if game.guild and game.guild.id in active_games:
-            del active_games[game.guild.id]
+        # Wait so players can see the results, then delete all game messages
+        # (the final message goes in the same bulk delete) and remove the game
+        track_message(game, final_message)
+        await _delayed_cleanup(game, 30)
             
     except Exception as e:
         logger.error(f"Error in end_game: {e}", exc_info=True)
         # Try to clean up even if there was an error
-        if game.guild and game.guild.id in active_games:
-            del active_games[game.guild.id]
+        if game.guild:
+            remove_game(game.guild.id, game)
 
 
 # ==================== DM MESSAGE HANDLER FOR MAFIA CHAT ====================
 
 # Game command prefixes to track for deletion
-GAME_COMMANDS = ['!mafia', '!testmafia', '!startgame', '!endgame', '!testroles', '!teststart', 
-                 '!testkill', '!testsave', '!testvote', '!testskip', '!teststatus', '!testhelp',
-                 '!gamestatus', '!gamesettings', '!setmafia', '!setdoctor', '!setpolice',
-                 '!setvotetime', '!setdiscusstime', '!setnighttime', '!setregtime', '!mafiahelp']
+# Set so on_message can match a command name with a single hash lookup
+GAME_COMMANDS = frozenset({'!mafia', '!testmafia', '!startgame', '!endgame', '!testroles', '!teststart', 
+                           '!testkill', '!testsave', '!testvote', '!testskip', '!teststatus', '!testhelp',
+                           '!gamestatus', '!gamesettings', '!setmafia', '!setdoctor', '!setpolice',
+                           '!setvotetime', '!setdiscusstime', '!setnighttime', '!setregtime', '!mafiahelp'})
 
 
 @bot.event
 async def on_message(message):
-    # Track game-related user commands for deletion
-    if message.guild and not message.author.bot:
+    # Track game-related user commands for deletion (only "!" messages can be commands)
+    if active_games and message.guild and not message.author.bot and message.content.startswith('!'):
         game = get_game(message.guild.id)
         if game and game.phase != GamePhase.ENDED:
-            # Check if it's a game command
-            content_lower = message.content.lower()
-            if any(content_lower.startswith(cmd) for cmd in GAME_COMMANDS):
-                game.game_messages.append(message)
+            # Check if it's a game command (the first word is the command name)
+            if message.content.split(maxsplit=1)[0].lower() in GAME_COMMANDS:
+                track_message(game, message)
     
     # Process commands
     await bot.process_commands(message)
     
     # Handle mafia chat relay
-    if isinstance(message.channel, discord.DMChannel) and not message.author.bot:
+    if active_games and isinstance(message.channel, discord.DMChannel) and not message.author.bot:
         # Find if this user is a mafia in an active game
-        for game in active_games.values():
-            if game.phase == GamePhase.NIGHT:
-                player = game.players.get(message.author.id)
-                if player and player.role == Role.MAFIA and player.is_alive:
-                    # Relay message to other mafia
-                    await relay_mafia_message(game, player, message.content)
-                    break
+        game = mafia_games.get(message.author.id)
+        if game and game.phase == GamePhase.NIGHT and message.author.id in game.mafia_ids:
+            # Relay message to other mafia
+            await relay_mafia_message(game, game.players[message.author.id], message.content)
 
 
 # ==================== VOICE OPERATOR COMMANDS ====================
@@ -2357,7 +2569,7 @@ async def voice_info(ctx, channel: discord.VoiceChannel = None):
     embed.add_field(name="User Limit", value=str(channel.user_limit) if channel.user_limit else "No limit", inline=True)
     embed.add_field(name="Bitrate", value=f"{channel.bitrate // 1000} kbps", inline=True)
     
-    members_list = "\n".join([f"• {member.name}" for member in channel.members[:10]])
+    members_list = "\n".join(f"• {member.name}" for member in channel.members[:10])
     if len(channel.members) > 10:
         members_list += f"\n...and {len(channel.members) - 10} more"
     
@@ -2457,11 +2669,11 @@ async def start_mafia(ctx):
         game.host_id = ctx.author.id  # Set the host
         
         # Track the command message
-        game.game_messages.append(ctx.message)
+        track_message(game, ctx.message)
         
         # Join voice channel using safe connection helper
         connecting_msg = await ctx.send("🔄 Connecting to voice channel...")
-        game.game_messages.append(connecting_msg)
+        track_message(game, connecting_msg)
         
         success, vc = await safe_voice_connect(ctx.author.voice.channel, ctx.guild)
         
@@ -2474,7 +2686,7 @@ async def start_mafia(ctx):
             await connecting_msg.edit(content="✅ Voice connection skipped (muting still works, audio announcements disabled)")
         
         # Send registration message with new view
-        min_players = game.settings.num_mafia + game.settings.num_doctor + game.settings.num_police + 1
+        min_players = game.settings.min_players
         embed = discord.Embed(
             title="🌙 Night Has Come - Registration",
             description=f"Click the buttons below to join or leave the game!\n\n**Players (0):**\n*No players yet*",
@@ -2484,12 +2696,12 @@ async def start_mafia(ctx):
         embed.add_field(name="⚙️ Settings", value=f"Mafia: {game.settings.num_mafia} | Doctor: {game.settings.num_doctor} | Police: {game.settings.num_police}", inline=True)
         embed.set_footer(text=f"Host: {ctx.author.display_name} • Click 'Start Game' when ready")
         
-        view = RegistrationView(ctx.guild.id, ctx.author.id)
+        view = RegistrationView(ctx.guild.id, ctx.author.id, game)
         game.registration_message = await ctx.send(embed=embed, view=view)
-        game.game_messages.append(game.registration_message)
+        track_message(game, game.registration_message)
         
         msg = await ctx.send(f"🎮 **Game registration started!** Join using the button above.\n💡 Host or admins can click **Start Game** when everyone has joined.")
-        game.game_messages.append(msg)
+        track_message(game, msg)
     except Exception as e:
         logger.error(f"Error starting mafia game: {e}", exc_info=True)
         await ctx.send("❌ An error occurred while starting the game. Check logs for details.")
@@ -2531,12 +2743,12 @@ async def test_mafia(ctx, num_players: int = 6):
         game.host_id = ctx.author.id
         
         # Track the command message
-        game.game_messages.append(ctx.message)
+        track_message(game, ctx.message)
         
         # Join voice channel if user is in one (using safe connection helper)
         if ctx.author.voice:
             connecting_msg = await ctx.send("🔄 Connecting to voice channel...")
-            game.game_messages.append(connecting_msg)
+            track_message(game, connecting_msg)
             
             success, vc = await safe_voice_connect(ctx.author.voice.channel, ctx.guild)
             
@@ -2551,7 +2763,7 @@ async def test_mafia(ctx, num_players: int = 6):
         else:
             game.voice_connected = False
             msg = await ctx.send("💡 Tip: Join a voice channel before starting for the bot to join too!")
-            game.game_messages.append(msg)
+            track_message(game, msg)
         
         # Reduce timers for faster testing
         game.settings.voting_time = 20
@@ -2559,18 +2771,13 @@ async def test_mafia(ctx, num_players: int = 6):
         
         # Add the tester as a real player
         tester_player = Player(member=ctx.author, name=ctx.author.display_name)
-        game.players[ctx.author.id] = tester_player
+        game.add_player(tester_player)
         
         # Add dummy players
-        for i in range(num_players - 1):
+        for i, name in enumerate(TEST_PLAYER_NAMES[:num_players - 1]):
             dummy_id = 100000 + i  # Fake IDs for dummy players
-            dummy_member = DummyMember(
-                id=dummy_id,
-                display_name=TEST_PLAYER_NAMES[i],
-                name=TEST_PLAYER_NAMES[i]
-            )
-            dummy_player = Player(member=dummy_member, name=TEST_PLAYER_NAMES[i])
-            game.players[dummy_id] = dummy_player
+            dummy_member = DummyMember(id=dummy_id, display_name=name, name=name)
+            game.add_player(Player(member=dummy_member, name=name))
         
         embed = discord.Embed(
             title="🧪 TEST MODE - Night Has Come",
@@ -2578,32 +2785,52 @@ async def test_mafia(ctx, num_players: int = 6):
             color=discord.Color.orange()
         )
         
-        player_list = "\n".join([f"• {p.name} {'(You)' if p.member.id == ctx.author.id else '(Bot)'}" for p in game.players.values()])
+        author_id = ctx.author.id
+        player_list = "\n".join(f"• {p.name} {'(You)' if p.member.id == author_id else '(Bot)'}" for p in game.players.values())
         embed.add_field(name=f"Players ({len(game.players)})", value=player_list, inline=False)
         embed.add_field(name="⚙️ Settings", value=f"Mafia: {game.settings.num_mafia} | Doctor: {game.settings.num_doctor} | Police: {game.settings.num_police}", inline=False)
         embed.add_field(name="⏱️ Timers (Reduced)", value=f"Vote: {game.settings.voting_time}s | Discuss: {game.settings.discussion_time}s", inline=False)
         
         msg = await ctx.send(embed=embed)
-        game.game_messages.append(msg)
+        track_message(game, msg)
         msg = await ctx.send("🎮 Use `!testroles` to assign roles and see all of them, or `!teststart` to begin!")
-        game.game_messages.append(msg)
+        track_message(game, msg)
     except Exception as e:
         logger.error(f"Error starting test mafia game: {e}", exc_info=True)
         await ctx.send("❌ An error occurred while starting the test game. Check logs for details.")
 
 
+# Role group headings for !testroles, in display order
+ROLE_DISPLAY = [
+    (Role.MAFIA, f"{ROLE_ICONS[Role.MAFIA]} Mafia"),
+    (Role.DOCTOR, f"{ROLE_ICONS[Role.DOCTOR]} Doctor"),
+    (Role.POLICE, f"{ROLE_ICONS[Role.POLICE]} Police"),
+    (Role.CITIZEN, "👤 Citizens"),
+]
+
+
+def require_test_game(func):
+    """Run a test command only when a test game exists, exposing it as ctx.game"""
+    @functools.wraps(func)
+    async def wrapper(ctx, *args, **kwargs):
+        game = get_game(ctx.guild.id)
+        if not game or not game.settings.test_mode:
+            await ctx.send("❌ No test game in progress! Use `!testmafia` to start one.")
+            return
+        
+        # Track the command message
+        track_message(game, ctx.message)
+        ctx.game = game
+        return await func(ctx, *args, **kwargs)
+    return wrapper
+
+
 @bot.command(name='testroles', help='Assign and reveal all roles (test mode)')
 @commands.has_permissions(administrator=True)
+@require_test_game
 async def test_roles(ctx):
     """Assign roles and show them all to the tester"""
-    game = get_game(ctx.guild.id)
-    
-    if not game or not game.settings.test_mode:
-        await ctx.send("❌ No test game in progress! Use `!testmafia` to start one.")
-        return
-    
-    # Track the command message
-    game.game_messages.append(ctx.message)
+    game = ctx.game
     
     # Assign roles
     await assign_roles(game)
@@ -2615,24 +2842,14 @@ async def test_roles(ctx):
         color=discord.Color.gold()
     )
     
-    role_groups = {
-        Role.MAFIA: [],
-        Role.DOCTOR: [],
-        Role.POLICE: [],
-        Role.CITIZEN: []
-    }
-    
+    role_groups: Dict[Role, List[str]] = defaultdict(list)
     for player in game.players.values():
         role_groups[player.role].append(player.name)
     
-    if role_groups[Role.MAFIA]:
-        embed.add_field(name="🔪 Mafia", value="\n".join(role_groups[Role.MAFIA]), inline=True)
-    if role_groups[Role.DOCTOR]:
-        embed.add_field(name="💉 Doctor", value="\n".join(role_groups[Role.DOCTOR]), inline=True)
-    if role_groups[Role.POLICE]:
-        embed.add_field(name="🔍 Police", value="\n".join(role_groups[Role.POLICE]), inline=True)
-    if role_groups[Role.CITIZEN]:
-        embed.add_field(name="👤 Citizens", value="\n".join(role_groups[Role.CITIZEN]), inline=True)
+    for role, label in ROLE_DISPLAY:
+        names = role_groups.get(role)
+        if names:
+            embed.add_field(name=label, value="\n".join(names), inline=True)
     
     # Show tester's role prominently
     tester_player = game.players.get(ctx.author.id)
@@ -2640,199 +2857,151 @@ async def test_roles(ctx):
         embed.add_field(name="⭐ Your Role", value=f"**{tester_player.role.value}**", inline=False)
     
     msg = await ctx.send(embed=embed)
-    game.game_messages.append(msg)
+    track_message(game, msg)
 
 
 @bot.command(name='teststart', help='Start the test game')
 @commands.has_permissions(administrator=True)
+@require_test_game
 async def test_start(ctx):
     """Start the test game"""
-    game = get_game(ctx.guild.id)
-    
-    if not game or not game.settings.test_mode:
-        await ctx.send("❌ No test game in progress! Use `!testmafia` to start one.")
-        return
-    
-    # Track the command message
-    game.game_messages.append(ctx.message)
+    game = ctx.game
     
     # Check if roles are assigned
-    if all(p.role == Role.CITIZEN for p in game.players.values()):
+    if not game.roles_assigned:
         msg = await ctx.send("⚠️ Roles not assigned yet. Assigning now...")
-        game.game_messages.append(msg)
+        track_message(game, msg)
         await assign_roles(game)
         
         # Show roles
         embed = discord.Embed(title="🎭 Roles Assigned", color=discord.Color.gold())
+        author_id = ctx.author.id
         for player in game.players.values():
-            is_you = " (You)" if player.member.id == ctx.author.id else ""
+            is_you = " (You)" if player.member.id == author_id else ""
             embed.add_field(name=player.name + is_you, value=player.role.value, inline=True)
         msg = await ctx.send(embed=embed)
-        game.game_messages.append(msg)
+        track_message(game, msg)
         await asyncio.sleep(2)
     
     msg = await ctx.send("🎮 **Starting test game!**")
-    game.game_messages.append(msg)
+    track_message(game, msg)
     await asyncio.sleep(1)
     
     # Start first night
-    await start_night_phase(game)
+    spawn_game_task(game, start_night_phase(game))
 
 
 @bot.command(name='testkill', help='Simulate mafia kill (test mode)')
 @commands.has_permissions(administrator=True)
+@require_test_game
 async def test_kill(ctx, target_name: str):
     """Simulate mafia choosing a target"""
-    game = get_game(ctx.guild.id)
-    
-    if not game or not game.settings.test_mode:
-        await ctx.send("❌ No test game in progress!")
-        return
-    
-    # Track the command message
-    game.game_messages.append(ctx.message)
+    game = ctx.game
     
     if game.phase != GamePhase.NIGHT:
         msg = await ctx.send("❌ It's not night time!")
-        game.game_messages.append(msg)
+        track_message(game, msg)
         return
     
     # Find target by name
-    target = None
-    for player in game.players.values():
-        if player.name.lower() == target_name.lower() and player.is_alive:
-            target = player
-            break
+    target = game.find_alive_player(target_name)
     
     if not target:
         msg = await ctx.send(f"❌ Player '{target_name}' not found or already dead!")
-        game.game_messages.append(msg)
+        track_message(game, msg)
         return
     
-    # Set all mafia votes to this target
-    for player in game.players.values():
-        if player.role == Role.MAFIA and player.is_alive:
-            game.mafia_votes[player.member.id] = target.member.id
+    # Set all alive mafia votes to this target
+    game.mafia_votes.update(dict.fromkeys(game.mafia_ids, target.member.id))
     
     msg = await ctx.send(f"🔪 Test: Mafia will target **{target.name}**")
-    game.game_messages.append(msg)
+    track_message(game, msg)
 
 
 @bot.command(name='testsave', help='Simulate doctor save (test mode)')
 @commands.has_permissions(administrator=True)
+@require_test_game
 async def test_save(ctx, target_name: str):
     """Simulate doctor saving a target"""
-    game = get_game(ctx.guild.id)
-    
-    if not game or not game.settings.test_mode:
-        await ctx.send("❌ No test game in progress!")
-        return
-    
-    # Track the command message
-    game.game_messages.append(ctx.message)
+    game = ctx.game
     
     if game.phase != GamePhase.NIGHT:
         msg = await ctx.send("❌ It's not night time!")
-        game.game_messages.append(msg)
+        track_message(game, msg)
         return
     
     # Find target by name
-    target = None
-    for player in game.players.values():
-        if player.name.lower() == target_name.lower() and player.is_alive:
-            target = player
-            break
+    target = game.find_alive_player(target_name)
     
     if not target:
         msg = await ctx.send(f"❌ Player '{target_name}' not found or already dead!")
-        game.game_messages.append(msg)
+        track_message(game, msg)
         return
     
     game.doctor_save = target.member.id
     msg = await ctx.send(f"💉 Test: Doctor will save **{target.name}**")
-    game.game_messages.append(msg)
+    track_message(game, msg)
 
 
 @bot.command(name='testvote', help='Simulate voting (test mode)')
 @commands.has_permissions(administrator=True)
+@require_test_game
 async def test_vote(ctx, target_name: str = None):
     """Simulate all dummy players voting for a target"""
-    game = get_game(ctx.guild.id)
-    
-    if not game or not game.settings.test_mode:
-        await ctx.send("❌ No test game in progress!")
-        return
-    
-    # Track the command message
-    game.game_messages.append(ctx.message)
+    game = ctx.game
     
     if game.phase != GamePhase.VOTING:
         msg = await ctx.send("❌ It's not voting time!")
-        game.game_messages.append(msg)
+        track_message(game, msg)
         return
     
+    # Every alive player except the tester
+    dummy_ids = game.alive_ids - {ctx.author.id}
+    
     if target_name is None or target_name.lower() == "skip":
         # All dummy players skip
-        for player in game.players.values():
-            if player.member.id != ctx.author.id and player.is_alive:
-                game.day_votes[player.member.id] = None
+        game.day_votes.update(dict.fromkeys(dummy_ids))
         msg = await ctx.send("⏭️ Test: All dummy players will skip")
-        game.game_messages.append(msg)
+        track_message(game, msg)
+        check_all_votes_in(game)
     else:
         # Find target
-        target = None
-        for player in game.players.values():
-            if player.name.lower() == target_name.lower() and player.is_alive:
-                target = player
-                break
+        target = game.find_alive_player(target_name)
         
         if not target:
             msg = await ctx.send(f"❌ Player '{target_name}' not found or already dead!")
-            game.game_messages.append(msg)
+            track_message(game, msg)
             return
         
         # All dummy players vote for target
-        for player in game.players.values():
-            if player.member.id != ctx.author.id and player.is_alive:
-                game.day_votes[player.member.id] = target.member.id
+        game.day_votes.update(dict.fromkeys(dummy_ids, target.member.id))
         
         msg = await ctx.send(f"🗳️ Test: All dummy players will vote for **{target.name}**")
-        game.game_messages.append(msg)
+        track_message(game, msg)
+        check_all_votes_in(game)
 
 
 @bot.command(name='testskip', help='Skip current phase timer (test mode)')
 @commands.has_permissions(administrator=True)
+@require_test_game
 async def test_skip_phase(ctx):
     """Skip the current phase timer"""
-    game = get_game(ctx.guild.id)
-    
-    if not game or not game.settings.test_mode:
-        await ctx.send("❌ No test game in progress!")
-        return
-    
-    # Track the command message
-    game.game_messages.append(ctx.message)
+    game = ctx.game
     
     # Set all timers to 1 second for quick skip
     game.settings.voting_time = 1
     game.settings.discussion_time = 1
     
     msg = await ctx.send("⏩ Test: Timers reduced to 1 second. Phase will end shortly.")
-    game.game_messages.append(msg)
+    track_message(game, msg)
 
 
 @bot.command(name='teststatus', help='Show detailed test game status')
 @commands.has_permissions(administrator=True)
+@require_test_game
 async def test_status(ctx):
     """Show detailed status of test game"""
-    game = get_game(ctx.guild.id)
-    
-    if not game or not game.settings.test_mode:
-        await ctx.send("❌ No test game in progress!")
-        return
-    
-    # Track the command message
-    game.game_messages.append(ctx.message)
+    game = ctx.game
     
     embed = discord.Embed(
         title="🧪 Test Game Status",
@@ -2843,46 +3012,43 @@ async def test_status(ctx):
     embed.add_field(name="Round", value=str(game.round_number), inline=True)
     
     # Show all players with roles and status
-    player_info = []
-    for player in game.players.values():
-        status = "✅" if player.is_alive else "💀"
-        is_you = " ⭐" if player.member.id == ctx.author.id else ""
-        player_info.append(f"{status} **{player.name}**{is_you} - {player.role.value}")
+    author_id = ctx.author.id
+    players = game.players
+    player_info = "\n".join(
+        f"{ALIVE_ICON if p.is_alive else DEAD_ICON} **{p.name}**{' ⭐' if p.member.id == author_id else ''} - {p.role.value}"
+        for p in players.values()
+    )
     
-    embed.add_field(name="Players", value="\n".join(player_info), inline=False)
+    embed.add_field(name="Players", value=player_info, inline=False)
     
     # Night action status
     if game.phase == GamePhase.NIGHT:
         night_info = []
         if game.mafia_votes:
-            targets = [game.players[tid].name for tid in game.mafia_votes.values() if tid in game.players]
+            targets = [p.name for p in map(players.get, game.mafia_votes.values()) if p]
             night_info.append(f"🔪 Mafia targeting: {', '.join(targets) if targets else 'Not decided'}")
         if game.doctor_save:
-            saved = game.players.get(game.doctor_save)
+            saved = players.get(game.doctor_save)
             night_info.append(f"💉 Doctor saving: {saved.name if saved else 'Not decided'}")
         if night_info:
             embed.add_field(name="Night Actions", value="\n".join(night_info), inline=False)
     
     # Voting status
     if game.phase == GamePhase.VOTING:
-        votes_info = []
-        for voter_id, target_id in game.day_votes.items():
-            voter = game.players.get(voter_id)
-            if target_id is None:
-                votes_info.append(f"{voter.name}: Skip")
-            else:
-                target = game.players.get(target_id)
-                votes_info.append(f"{voter.name}: {target.name if target else 'Unknown'}")
+        votes_info = "\n".join(
+            f"{players[voter_id].name}: "
+            f"{'Skip' if target_id is None else players[target_id].name if target_id in players else 'Unknown'}"
+            for voter_id, target_id in game.day_votes.items()
+        )
         if votes_info:
-            embed.add_field(name="Current Votes", value="\n".join(votes_info), inline=False)
+            embed.add_field(name="Current Votes", value=votes_info, inline=False)
     
     msg = await ctx.send(embed=embed)
-    game.game_messages.append(msg)
+    track_message(game, msg)
 
 
-@bot.command(name='testhelp', help='Show test mode commands')
-async def test_help(ctx):
-    """Show all test mode commands"""
+def build_test_help_embed() -> discord.Embed:
+    """Build the test mode command list"""
     embed = discord.Embed(
         title="🧪 Test Mode Commands",
         description="Commands for testing the Mafia game solo",
@@ -2927,7 +3093,17 @@ async def test_help(ctx):
         inline=False
     )
     
-    await ctx.send(embed=embed)
+    return embed
+
+
+# Help text never changes, so build the embed once
+TEST_HELP_EMBED = build_test_help_embed()
+
+
+@bot.command(name='testhelp', help='Show test mode commands')
+async def test_help(ctx):
+    """Show all test mode commands"""
+    await ctx.send(embed=TEST_HELP_EMBED)
 
 
 @bot.command(name='startgame', help='Start the game after registration')
@@ -2941,17 +3117,17 @@ async def force_start_game(ctx):
         return
     
     # Track the command message
-    game.game_messages.append(ctx.message)
+    track_message(game, ctx.message)
     
-    min_players = game.settings.num_mafia + game.settings.num_doctor + game.settings.num_police + 1
+    min_players = game.settings.min_players
     
     if len(game.players) < min_players:
         msg = await ctx.send(f"❌ Need at least {min_players} players to start! Currently have {len(game.players)}.")
-        game.game_messages.append(msg)
+        track_message(game, msg)
         return
     
     msg = await ctx.send("🎮 **Starting the game!**")
-    game.game_messages.append(msg)
+    track_message(game, msg)
     
     # Assign roles
     await assign_roles(game)
@@ -2959,7 +3135,7 @@ async def force_start_game(ctx):
     await asyncio.sleep(3)
     
     # Start first night
-    await start_night_phase(game)
+    spawn_game_task(game, start_night_phase(game))
 
 
 @bot.command(name='endgame', help='End the current game')
@@ -2974,9 +3150,10 @@ async def end_current_game(ctx):
     
     # IMMEDIATELY set phase to ENDED to stop all async game loops
     game.phase = GamePhase.ENDED
+    await cancel_game_tasks(game)
     
     # Track the command message
-    game.game_messages.append(ctx.message)
+    track_message(game, ctx.message)
     
     embed = discord.Embed(
         title="🛑 Game Ended",
@@ -2985,15 +3162,12 @@ async def end_current_game(ctx):
     )
     
     if game.players:
-        # Check if roles were actually assigned (not all Citizens)
-        roles_assigned = not all(p.role == Role.CITIZEN for p in game.players.values())
-        
-        if roles_assigned:
-            role_reveal = []
-            for player in game.players.values():
-                status = "✅" if player.is_alive else "💀"
-                role_reveal.append(f"{status} **{player.name}** - {player.role.value}")
-            embed.add_field(name="🎭 Role Reveal", value="\n".join(role_reveal), inline=False)
+        if game.roles_assigned:
+            role_reveal = "\n".join(
+                f"{ALIVE_ICON if player.is_alive else DEAD_ICON} **{player.name}** - {player.role.value}"
+                for player in game.players.values()
+            )
+            embed.add_field(name="🎭 Role Reveal", value=role_reveal, inline=False)
         else:
             # Game ended during registration, roles never assigned
             player_list = [f"• {p.name}" for p in game.players.values()]
@@ -3001,34 +3175,27 @@ async def end_current_game(ctx):
             embed.add_field(name="ℹ️ Note", value="Game ended before roles were assigned.\nUse `!teststart` or `!testroles` to assign roles before playing.", inline=False)
     
     msg = await ctx.send(embed=embed)
-    game.game_messages.append(msg)
+    track_message(game, msg)
     
-    # Unmute all players (works even without bot in voice channel)
-    for player in game.players.values():
-        if hasattr(player.member, 'voice') and player.member.voice:
-            try:
-                await player.member.edit(mute=False)
-            except:
-                pass
+    # Unmute all players concurrently (works even without bot in voice channel)
+    await asyncio.gather(*(
+        _safe_edit_mute(player, False) for player in game.players.values()
+        if player.member.voice and player.member.voice.mute
+    ))
     
     # Disconnect from voice if connected
     if ctx.voice_client:
         try:
             await ctx.voice_client.disconnect(force=True)
-        except:
+        except Exception:
             pass
     
     # Send message about cleanup
     cleanup_msg = await ctx.send("🧹 Game messages will be deleted in 30 seconds...")
-    game.game_messages.append(cleanup_msg)
-    
-    # Wait and then delete all game messages
-    await asyncio.sleep(30)
-    await delete_game_messages(game)
+    track_message(game, cleanup_msg)
     
-    # Remove game from active games
-    if ctx.guild.id in active_games:
-        del active_games[ctx.guild.id]
+    # Clean up in the background; an ended game doesn't block starting a new one
+    spawn_game_task(game, _delayed_cleanup(game, 30))
 
 
 @bot.command(name='forcestop', aliases=['haltgame', 'killgame'], help='Force stop ALL games and reset ALL voice states immediately')
@@ -3050,10 +3217,11 @@ async def force_stop_all_games(ctx):
     if game:
         game.phase = GamePhase.ENDED
         logger.info(f"Game phase set to ENDED")
+        await cancel_game_tasks(game)
     
     # Remove from active games IMMEDIATELY
     if ctx.guild.id in active_games:
-        del active_games[ctx.guild.id]
+        remove_game(ctx.guild.id)
         logger.info(f"Game removed from active_games")
     
     # Count of actions taken
@@ -3066,7 +3234,7 @@ async def force_stop_all_games(ctx):
         for member in channel.members:
             if not member.bot:
                 try:
-                    needs_unmute = member.voice.mute if member.voice else False
+                    needs_unmute = bool(member.voice and member.voice.mute)
                     
                     if needs_unmute:
                         await member.edit(mute=False)
@@ -3080,28 +3248,26 @@ async def force_stop_all_games(ctx):
     # Also try to unmute game players who might have left the channel
     if game and game.players:
         for player in game.players.values():
-            if hasattr(player.member, 'voice') and player.member.voice:
+            vs = player.member.voice
+            if vs and vs.mute:
                 try:
-                    needs_unmute = player.member.voice.mute if player.member.voice else False
-                    
-                    if needs_unmute:
-                        await player.member.edit(mute=False)
-                        unmuted_count += 1
-                except:
+                    await player.member.edit(mute=False)
+                    unmuted_count += 1
+                except Exception:
                     pass
     
     # Disconnect bot from voice if connected
     if ctx.voice_client:
         try:
             await ctx.voice_client.disconnect(force=True)
-        except:
+        except Exception:
             pass
     
     # Also check if guild has a voice client (backup check)
     if ctx.guild.voice_client:
         try:
             await ctx.guild.voice_client.disconnect(force=True)
-        except:
+        except Exception:
             pass
     
     # Build response embed
@@ -3138,7 +3304,7 @@ async def view_settings(ctx):
     if game:
         settings = game.settings
     else:
-        settings = GameSettings()
+        settings = guild_settings.get(ctx.guild.id) or GameSettings()
     
     embed = discord.Embed(
         title="⚙️ Mafia Game Settings",
@@ -3168,15 +3334,8 @@ async def set_mafia_count(ctx, count: int):
         await ctx.send("❌ Maximum 5 Mafia allowed!")
         return
     
-    game = get_game(ctx.guild.id)
-    if game and game.phase == GamePhase.REGISTRATION:
-        game.settings.num_mafia = count
-    else:
-        # Create settings for next game
-        if ctx.guild.id not in active_games:
-            game = create_game(ctx.guild.id)
-        game = active_games[ctx.guild.id]
-        game.settings.num_mafia = count
+    # Save for future games and apply to a game still in registration
+    update_setting(ctx.guild.id, "num_mafia", count, registration_only=True)
     
     await ctx.send(f"✅ Mafia count set to **{count}**")
 
@@ -3192,14 +3351,8 @@ async def set_doctor_count(ctx, count: int):
         await ctx.send("❌ Maximum 3 Doctors allowed!")
         return
     
-    game = get_game(ctx.guild.id)
-    if game and game.phase == GamePhase.REGISTRATION:
-        game.settings.num_doctor = count
-    else:
-        if ctx.guild.id not in active_games:
-            game = create_game(ctx.guild.id)
-        game = active_games[ctx.guild.id]
-        game.settings.num_doctor = count
+    # Save for future games and apply to a game still in registration
+    update_setting(ctx.guild.id, "num_doctor", count, registration_only=True)
     
     await ctx.send(f"✅ Doctor count set to **{count}**")
 
@@ -3215,14 +3368,8 @@ async def set_police_count(ctx, count: int):
         await ctx.send("❌ Maximum 3 Police allowed!")
         return
     
-    game = get_game(ctx.guild.id)
-    if game and game.phase == GamePhase.REGISTRATION:
-        game.settings.num_police = count
-    else:
-        if ctx.guild.id not in active_games:
-            game = create_game(ctx.guild.id)
-        game = active_games[ctx.guild.id]
-        game.settings.num_police = count
+    # Save for future games and apply to a game still in registration
+    update_setting(ctx.guild.id, "num_police", count, registration_only=True)
     
     await ctx.send(f"✅ Police count set to **{count}**")
 
@@ -3235,12 +3382,7 @@ async def set_vote_time(ctx, seconds: int):
         await ctx.send("❌ Voting time must be between 30 and 300 seconds!")
         return
     
-    game = get_game(ctx.guild.id)
-    if game:
-        game.settings.voting_time = seconds
-    else:
-        game = create_game(ctx.guild.id)
-        game.settings.voting_time = seconds
+    update_setting(ctx.guild.id, "voting_time", seconds)
     
     await ctx.send(f"✅ Voting time set to **{seconds}** seconds")
 
@@ -3253,18 +3395,11 @@ async def set_discuss_time(ctx, seconds: int):
         await ctx.send("❌ Discussion time must be between 30 and 600 seconds!")
         return
     
-    game = get_game(ctx.guild.id)
-    if game:
-        game.settings.discussion_time = seconds
-    else:
-        game = create_game(ctx.guild.id)
-        game.settings.discussion_time = seconds
+    update_setting(ctx.guild.id, "discussion_time", seconds)
     
     await ctx.send(f"✅ Discussion time set to **{seconds}** seconds")
 
 
-
-
 @bot.command(name='setregtime', help='Set registration time in seconds (30-300)')
 @commands.has_permissions(administrator=True)
 async def set_reg_time(ctx, seconds: int):
@@ -3273,12 +3408,7 @@ async def set_reg_time(ctx, seconds: int):
         await ctx.send("❌ Registration time must be between 30 and 300 seconds!")
         return
     
-    game = get_game(ctx.guild.id)
-    if game:
-        game.settings.registration_time = seconds
-    else:
-        game = create_game(ctx.guild.id)
-        game.settings.registration_time = seconds
+    update_setting(ctx.guild.id, "registration_time", seconds)
     
     await ctx.send(f"✅ Registration time set to **{seconds}** seconds")
 
@@ -3291,12 +3421,7 @@ async def set_skip_kills(ctx, count: int):
         await ctx.send("❌ Mafia skip kills must be between 0 and 5!")
         return
     
-    game = get_game(ctx.guild.id)
-    if game:
-        game.settings.mafia_skip_kills = count
-    else:
-        game = create_game(ctx.guild.id)
-        game.settings.mafia_skip_kills = count
+    update_setting(ctx.guild.id, "mafia_skip_kills", count)
     
     await ctx.send(f"✅ Mafia can now skip killing **{count}** time(s) per game")
 
@@ -3312,12 +3437,7 @@ async def set_reveal_mode(ctx, mode: int):
                        "**3** = Full role with suspense")
         return
     
-    game = get_game(ctx.guild.id)
-    if game:
-        game.settings.role_reveal_mode = mode
-    else:
-        game = create_game(ctx.guild.id)
-        game.settings.role_reveal_mode = mode
+    update_setting(ctx.guild.id, "role_reveal_mode", mode)
     
     labels = {1: "Hidden (no reveal)", 2: "Mafia or Not Mafia", 3: "Full role with suspense"}
     await ctx.send(f"✅ Role reveal mode set to **{mode}** — {labels[mode]}")
@@ -3341,18 +3461,23 @@ async def game_status(ctx):
     embed.add_field(name="Round", value=str(game.round_number), inline=True)
     embed.add_field(name="Total Players", value=str(len(game.players)), inline=True)
     
-    alive_players = [p.name for p in game.players.values() if p.is_alive]
-    dead_players = [p.name for p in game.players.values() if not p.is_alive]
-    
-    embed.add_field(name=f"✅ Alive ({len(alive_players)})", value="\n".join(alive_players) if alive_players else "None", inline=True)
-    embed.add_field(name=f"💀 Dead ({len(dead_players)})", value="\n".join(dead_players) if dead_players else "None", inline=True)
+    if game.phase in (GamePhase.WAITING, GamePhase.REGISTRATION):
+        # Nobody can have died before the game starts
+        names = "\n".join(p.name for p in game.players.values())
+        embed.add_field(name="👥 Players", value=names or "None", inline=False)
+    else:
+        alive_players, dead_players = [], []
+        for p in game.players.values():
+            (alive_players if p.is_alive else dead_players).append(p.name)
+        
+        embed.add_field(name=f"{ALIVE_ICON} Alive ({len(alive_players)})", value="\n".join(alive_players) if alive_players else "None", inline=True)
+        embed.add_field(name=f"{DEAD_ICON} Dead ({len(dead_players)})", value="\n".join(dead_players) if dead_players else "None", inline=True)
     
     await ctx.send(embed=embed)
 
 
-@bot.command(name='mafiahelp', help='Show Mafia game commands')
-async def mafia_help(ctx):
-    """Show all Mafia game commands"""
+def build_mafia_help_embed() -> discord.Embed:
+    """Build the Mafia game command list"""
     embed = discord.Embed(
         title="🌙 Night Has Come - Commands",
         description="Based on the K-Drama 'Night Has Come'",
@@ -3409,7 +3534,17 @@ async def mafia_help(ctx):
         inline=False
     )
     
-    await ctx.send(embed=embed)
+    return embed
+
+
+# Help text never changes, so build the embed once
+MAFIA_HELP_EMBED = build_mafia_help_embed()
+
+
+@bot.command(name='mafiahelp', help='Show Mafia game commands')
+async def mafia_help(ctx):
+    """Show all Mafia game commands"""
+    await ctx.send(embed=MAFIA_HELP_EMBED)
 
 
 # Error handling